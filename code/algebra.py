@@ -13,20 +13,33 @@ def xgcd(x, y):
 
 
 class BaseFieldElement:
+    # no per-instance __dict__: traces hold millions of these
+    __slots__ = ('value', 'field')
+
     def __init__(self, value, field):
         self.value = value
         self.field = field
 
+    # mixed operations with extension field elements (or vectors) are
+    # handled by the reflected operators of the right hand side
     def __add__(self, right):
+        if right.__class__ is not BaseFieldElement:
+            return NotImplemented
         return self.field.add(self, right)
 
     def __mul__(self, right):
+        if right.__class__ is not BaseFieldElement:
+            return NotImplemented
         return self.field.multiply(self, right)
 
     def __sub__(self, right):
+        if right.__class__ is not BaseFieldElement:
+            return NotImplemented
         return self.field.subtract(self, right)
 
     def __truediv__(self, right):
+        if right.__class__ is not BaseFieldElement:
+            return NotImplemented
         return self.field.divide(self, right)
 
     def __neg__(self):
@@ -37,15 +50,11 @@ class BaseFieldElement:
 
     # modular exponentiation -- be sure to encapsulate in parentheses!
     def __xor__(self, exponent):
-        acc = BaseFieldElement(1, self.field)
-        val = BaseFieldElement(self.value, self.field)
-        for i in reversed(range(len(bin(exponent)[2:]))):
-            acc = acc * acc
-            if (1 << i) & exponent != 0:
-                acc = acc * val
-        return acc
+        return self.field.power(self, exponent)
 
     def __eq__(self, other):
+        if other.__class__ is not BaseFieldElement:
+            return NotImplemented
         return self.value == other.value
 
     def __neq__(self, other):
@@ -58,10 +67,7 @@ class BaseFieldElement:
         return bytes(str(self).encode())
 
     def is_zero(self):
-        if self.value == 0:
-            return True
-        else:
-            return False
+        return self.value == 0
 
     def has_order_po2(self, order):
         assert(order & (order-1) == 0)
@@ -72,19 +78,32 @@ class BaseFieldElement:
     def __hash__(self):
         return self.value
 
+    def __reduce__(self):
+        return (BaseFieldElement, (self.value, self.field))
+
 
 class BaseField:
+    # integers below this bound map to interned elements
+    num_small_elements = 256
+
     def __init__(self, p):
         self.p = p
+        # elements are immutable, so canonical constants can be shared
+        self.small_elements = [BaseFieldElement(i, self)
+                               for i in range(min(p, BaseField.num_small_elements))]
+
+    # pickle (used for Merkle leafs and proofs) without the interned elements
+    def __reduce__(self):
+        return (BaseField, (self.p,))
 
     def lift(self, bfe):
         return bfe
 
     def zero(self):
-        return BaseFieldElement(0, self)
+        return self.small_elements[0]
 
     def one(self):
-        return BaseFieldElement(1, self)
+        return self.small_elements[1]
 
     def multiply(self, left, right):
         return BaseFieldElement((left.value * right.value) % self.p, self)
@@ -107,12 +126,17 @@ class BaseField:
         a, b, g = xgcd(right.value, self.p)
         return BaseFieldElement(left.value * a % self.p, self)
 
+    def power(self, base, exponent):
+        acc = BaseFieldElement(1, self)
+        val = BaseFieldElement(base.value, self)
+        for i in reversed(range(len(bin(exponent)[2:]))):
+            acc = acc * acc
+            if (1 << i) & exponent != 0:
+                acc = acc * val
+        return acc
+
     def main():
-        # p = 2^64 - 2^32 + 1
-        #   = 1 + 3 * 5 * 17 * 257 * 65537 * 2^32
-        #   = 1 + 4294967295 * 2^32
-        p = 18446744069414584321  # 2^64 - 2^32 + 1
-        return BaseField(p)
+        return GoldilocksField()
 
     def generator(self):
         assert(self.p == 1 + (1 << 64) - (1 << 32)
@@ -142,4 +166,63 @@ class BaseField:
         return BaseFieldElement(acc % self.p, self)
 
     def __call__(self, integer):
-        return BaseFieldElement(integer % self.p, self)
+        integer %= self.p
+        if integer < len(self.small_elements):
+            return self.small_elements[integer]
+        return BaseFieldElement(integer, self)
+
+
+class GoldilocksField(BaseField):
+    # p = 2^64 - 2^32 + 1
+    #   = 1 + 3 * 5 * 17 * 257 * 65537 * 2^32
+    #   = 1 + 4294967295 * 2^32
+    P = 18446744069414584321  # 2^64 - 2^32 + 1
+
+    def __init__(self):
+        super(GoldilocksField, self).__init__(GoldilocksField.P)
+
+    def __reduce__(self):
+        return (GoldilocksField, ())
+
+    # Operands are canonical, so sums and differences need at most one
+    # correction by p. Products keep the builtin `%`: in CPython one bigint
+    # modulo beats folding with 2^64 = 2^32 - 1, which costs five interpreted
+    # bigint operations (field_vector.reduce128 folds where it pays off).
+
+    def multiply(self, left, right):
+        return BaseFieldElement((left.value * right.value) % GoldilocksField.P, self)
+
+    def add(self, left, right):
+        value = left.value + right.value
+        if value >= GoldilocksField.P:
+            value -= GoldilocksField.P
+        return BaseFieldElement(value, self)
+
+    def subtract(self, left, right):
+        value = left.value - right.value
+        if value < 0:
+            value += GoldilocksField.P
+        return BaseFieldElement(value, self)
+
+    def negate(self, operand):
+        if operand.value == 0:
+            return self.small_elements[0]
+        return BaseFieldElement(GoldilocksField.P - operand.value, self)
+
+    def inverse(self, operand):
+        return BaseFieldElement(pow(operand.value, -1, GoldilocksField.P), self)
+
+    def divide(self, left, right):
+        assert(not right.is_zero()), "divide by zero"
+        return BaseFieldElement(left.value * pow(right.value, -1, GoldilocksField.P) % GoldilocksField.P, self)
+
+    def power(self, base, exponent):
+        return BaseFieldElement(pow(base.value, exponent, GoldilocksField.P), self)
+
+    def __call__(self, integer):
+        # skip the reduction for values that are already canonical
+        if not 0 <= integer < GoldilocksField.P:
+            integer %= GoldilocksField.P
+        if integer < BaseField.num_small_elements:
+            return self.small_elements[integer]
+        return BaseFieldElement(integer, self)
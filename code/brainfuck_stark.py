@@ -10,16 +10,26 @@ from memory_table import MemoryTable
 from permutation_argument import PermutationArgument
 from processor_table import ProcessorTable
 from salted_merkle import SaltedMerkle
+from table import Table
 from univariate import *
 from multivariate import *
 from ntt import *
 from functools import reduce
 import os
 
+try:
+    from field_vector import FieldVector, ExtensionFieldVector, vectorize
+except ImportError:  # NumPy is optional; fall back to lists of elements
+    FieldVector = None
+
 
 class BrainfuckStark:
     field = BaseField.main()
     xfield = ExtensionField.main()
+    # keep codewords in bit-reversed order; see Fri.Domain
+    bit_reversed = os.environ.get('BIT_REVERSED') is not None
+    # number of points FRI folds into one per round
+    folding_factor = int(os.environ.get('FOLDING_FACTOR', '2'))
 
     def __init__(self, running_time, memory_length, program, input_symbols, output_symbols):
         # set fields of computational integrity claim
@@ -101,7 +111,7 @@ class BrainfuckStark:
         generator = BrainfuckStark.field.generator()
         omega = BrainfuckStark.field.primitive_nth_root(fri_domain_length)
         self.fri = Fri(generator, omega, fri_domain_length,
-                       self.expansion_factor, self.num_colinearity_checks, self.xfield)
+                       self.expansion_factor, self.num_colinearity_checks, self.xfield, BrainfuckStark.bit_reversed, BrainfuckStark.folding_factor)
 
     def get_terminals(self) -> List[ExtensionFieldElement]:
         terminals = [self.processor_table.instruction_permutation_terminal,
@@ -168,14 +178,14 @@ class BrainfuckStark:
             randomizer_polynomial)
         randomizer_codewords += [randomizer_codeword]
 
-        base_codewords = reduce(
-            lambda x, y: x+y, [table.lde(self.fri.domain) for table in self.tables], [])
-        all_base_codewords = randomizer_codewords + base_codewords
+        base_codewords = Table.lde_tables(self.tables, self.fri.domain)
 
         base_degree_bounds = reduce(
             lambda x, y: x+y, [[table.interpolant_degree()] * table.base_width for table in self.tables], [])
 
-        zipped_codeword = list(zip(*all_base_codewords))
+        # leafs are rows across all tables; each table supplies its own rows
+        zipped_codeword = [sum(rows, (r,)) for r, *rows in zip(
+            randomizer_codeword, *[table.base_rows for table in self.tables])]
         base_tree = SaltedMerkle(zipped_codeword)
         proof_stream.push(base_tree.root())
 
@@ -191,10 +201,11 @@ class BrainfuckStark:
 
         terminals = self.get_terminals()
 
-        extension_codewords = reduce(
-            lambda x, y: x+y, [table.ldex(self.fri.domain, self.xfield) for table in self.tables], [])
+        extension_codewords = Table.lde_tables(
+            self.tables, self.fri.domain, self.xfield)
 
-        zipped_extension_codeword = list(zip(*extension_codewords))
+        zipped_extension_codeword = [sum(rows, ()) for rows in zip(
+            *[table.extension_rows for table in self.tables])]
         extension_tree = SaltedMerkle(zipped_extension_codeword)
         proof_stream.push(extension_tree.root())
 
@@ -238,19 +249,29 @@ class BrainfuckStark:
             weights_seed)
 
         # compute terms of nonlinear combination polynomial
+        if FieldVector is not None:
+            domain_points = FieldVector.from_elements(self.fri.domain.list())
+
+        def shifted(codeword, shift):
+            if FieldVector is not None:
+                return vectorize(codeword) * (domain_points ^ shift)
+            return [c * xs
+                    for c, xs in zip(codeword, self.fri.domain.powers(shift))]
+
         terms = [randomizer_codeword]
         # base_codewords = processor_base_codewords + instruction_base_codewords + \
         # memory_base_codewords + input_base_codewords + output_base_codewords
         assert (len(base_codewords) ==
                 num_base_polynomials), f"number of base codewords {len(base_codewords)} codewords =/= number of base polynomials {num_base_polynomials}!"
+        # base codewords stay in the base field; they meet the extension
+        # field only when multiplied by their weights
         for i in range(len(base_codewords)):
-            terms += [[self.xfield.lift(c) for c in base_codewords[i]]]
+            terms += [base_codewords[i]]
             shift = self.max_degree - base_degree_bounds[i]
-            terms += [[self.xfield.lift((self.fri.domain(j) ^ shift) * base_codewords[i][j])
-                      for j in range(self.fri.domain.length)]]
+            terms += [shifted(base_codewords[i], shift)]
             if os.environ.get('DEBUG') is not None:
                 print(f"before domain interpolation")
-                interpolated = self.fri.domain.xinterpolate(terms[-1])
+                interpolated = self.fri.domain.xinterpolate(list(terms[-1]))
                 print(
                     f"degree of interpolation, base_codewords({i}): {interpolated.degree()}")
                 assert (interpolated.degree() <= self.max_degree)
@@ -259,11 +280,10 @@ class BrainfuckStark:
         for i in range(len(extension_codewords)):
             terms += [extension_codewords[i]]
             shift = self.max_degree - extension_degree_bounds[i]
-            terms += [[self.xfield.lift(self.fri.domain(j) ^ shift) * extension_codewords[i][j]
-                      for j in range(self.fri.domain.length)]]
+            terms += [shifted(extension_codewords[i], shift)]
             if os.environ.get('DEBUG') is not None:
                 print(f"before domain interpolation")
-                interpolated = self.fri.domain.xinterpolate(terms[-1])
+                interpolated = self.fri.domain.xinterpolate(list(terms[-1]))
                 print(
                     f"degree of interpolation, extension_codewords({i}): {interpolated.degree()}")
                 assert (interpolated.degree() <= self.max_degree)
@@ -273,16 +293,15 @@ class BrainfuckStark:
         for quotient_codeword, quotient_degree_bound in zip(quotient_codewords, quotient_degree_bounds):
             terms += [quotient_codeword]
             if os.environ.get('DEBUG') is not None:
-                interpolated = self.fri.domain.xinterpolate(terms[-1])
+                interpolated = self.fri.domain.xinterpolate(list(terms[-1]))
                 assert (interpolated.degree() == -1 or interpolated.degree() <=
                         quotient_degree_bound), f"for unshifted quotient polynomial {i}, interpolated degree is {interpolated.degree()} but > degree bound i = {quotient_degree_bound}"
             shift = self.max_degree - quotient_degree_bound
 
-            terms += [[self.xfield.lift(self.fri.domain(j) ^ shift) * quotient_codeword[j]
-                      for j in range(self.fri.domain.length)]]
+            terms += [shifted(quotient_codeword, shift)]
             if os.environ.get('DEBUG') is not None:
                 print(f"before domain interpolation")
-                interpolated = self.fri.domain.xinterpolate(terms[-1])
+                interpolated = self.fri.domain.xinterpolate(list(terms[-1]))
                 print(
                     f"degree of interpolation, , quotient_codewords({i}): {interpolated.degree()}")
                 print("quotient  degree bound:", quotient_degree_bound)
@@ -294,11 +313,18 @@ class BrainfuckStark:
         assert (len(terms) == len(
             weights)), f"number of terms {len(terms)} is not equal to number of weights {len(weights)}"
 
-        combination_codeword = reduce(
-            lambda lhs, rhs: [l+r for l, r in zip(lhs, rhs)], [[w * e for e in t] for w, t in zip(weights, terms)], [self.xfield.zero()] * self.fri.domain.length)
-
-        # commit to combination codeword
-        combination_tree = Merkle(combination_codeword)
+        if FieldVector is not None:
+            combination = ExtensionFieldVector.zeros(
+                self.fri.domain.length, self.xfield)
+            for w, t in zip(weights, terms):
+                combination = combination + vectorize(t) * w
+            combination_codeword = combination.to_elements()
+        else:
+            combination_codeword = reduce(
+                lambda lhs, rhs: [l+r for l, r in zip(lhs, rhs)], [[w * e for e in t] for w, t in zip(weights, terms)], [self.xfield.zero()] * self.fri.domain.length)
+
+        # commit to combination codeword, with leafs as in the first FRI round
+        combination_tree = Merkle(self.fri.leafs(combination_codeword))
         proof_stream.push(combination_tree.root())
 
         # get indices of leafs to prove nonlinear combination
@@ -313,7 +339,8 @@ class BrainfuckStark:
         # open leafs of zipped codewords at indicated positions
         for index in indices:
             for distance in [0] + unit_distances:
-                idx = (index + distance) % self.fri.domain.length
+                idx = self.fri.domain.position(
+                    (index + distance) % self.fri.domain.length)
                 element = base_tree.leafs[idx][0]
                 salt, path = base_tree.open(idx)
                 proof_stream.push(element)
@@ -327,10 +354,11 @@ class BrainfuckStark:
 
         # open combination codeword at the same positions
         for index in indices:
-            proof_stream.push(combination_tree.leafs[index])
-            proof_stream.push(combination_tree.open(index))
-            assert (Merkle.verify(combination_tree.root(), index,
-                                  combination_tree.open(index), combination_tree.leafs[index]))
+            position, slot = self.fri.locate(index, self.fri.domain.length)
+            proof_stream.push(combination_tree.leafs[position])
+            proof_stream.push(combination_tree.open(position))
+            assert (Merkle.verify(combination_tree.root(), position,
+                                  combination_tree.open(position), combination_tree.leafs[position]))
 
         # prove low degree of combination polynomial, and collect indices
         indices = self.fri.prove(combination_codeword, proof_stream)
@@ -422,27 +450,33 @@ class BrainfuckStark:
         for index in indices:
             for distance in [0] + unit_distances:
                 idx = (index + distance) % self.fri.domain.length
+                position = self.fri.domain.position(idx)
 
                 element = proof_stream.pull()
                 salt, path = proof_stream.pull()
                 verifier_verdict = verifier_verdict and SaltedMerkle.verify(
-                    base_root, idx, salt, path, element)
-                tuples[idx] = [self.xfield.lift(e) for e in list(element)]
+                    base_root, position, salt, path, element)
+                tuples[idx] = list(element)
                 assert (
                     verifier_verdict), "salted base tree verify must succeed for base codewords"
 
                 element = proof_stream.pull()
                 salt, path = proof_stream.pull()
                 verifier_verdict = verifier_verdict and SaltedMerkle.verify(
-                    extension_root, idx, salt, path, element)
+                    extension_root, position, salt, path, element)
                 tuples[idx] = tuples[idx] + list(element)
                 assert (
                     verifier_verdict), "salted base tree verify must succeed for extension codewords"
 
         assert (num_base_polynomials == len(base_degree_bounds)
                 ), f"number of base polynomials {num_base_polynomials} =/= number of base degree bounds {len(base_degree_bounds)}"
+
+        omicron_inverses = [table.omicron.inverse() for table in self.tables]
+
         # verify nonlinear combination
         for index in indices:
+            domain_point = self.fri.domain(index)
+
             # collect terms: randomizer
             terms: list[ExtensionFieldElement] = tuples[index][0:num_randomizer_polynomials]
 
@@ -452,7 +486,7 @@ class BrainfuckStark:
                 shift = self.max_degree - \
                     base_degree_bounds[i-num_randomizer_polynomials]
                 terms += [tuples[index][i] *
-                          self.xfield.lift(self.fri.domain(index) ^ shift)]
+                          (domain_point ^ shift)]
 
             # collect terms: extension
             extension_offset = num_randomizer_polynomials + \
@@ -465,7 +499,7 @@ class BrainfuckStark:
                 terms += [tuples[index][extension_offset+i]]
                 shift = self.max_degree - extension_degree_bounds[i]
                 terms += [tuples[index][extension_offset+i]
-                          * self.xfield.lift(self.fri.domain(index) ^ shift)]
+                          * (domain_point ^ shift)]
 
             # collect terms: quotients
             # quotients need to be computed
@@ -487,18 +521,32 @@ class BrainfuckStark:
             assert (acc_index == len(
                 tuples[index]), "Column count in verifier must match until end")
 
+            # invert all zerofier values at this index with one inversion;
+            # they live in the base field
+            zerofiers = [domain_point - self.field.one()]
+            for table, omicron_inverse in zip(self.tables, omicron_inverses):
+                zerofiers += [domain_point - omicron_inverse]
+                # If height == 0, then there is no subgroup where the transition polynomials should be zero.
+                # The fast zerofier (based on group theory) needs a non-empty group.
+                # Forcing it on an empty group generates a division by zero error.
+                if table.height != 0:
+                    zerofiers += [(domain_point ^ table.height) - self.field.one()]
+            zerofier_inverses = iter(batch_inverse(zerofiers))
+            boundary_zerofier_inverse = next(zerofier_inverses)
+
             base_acc_index = num_randomizer_polynomials
             ext_acc_index = extension_offset
-            for point, table in zip(points, self.tables):
+            for point, table, omicron_inverse in zip(points, self.tables, omicron_inverses):
+                terminal_zerofier_inverse = next(zerofier_inverses)
+
                 # boundary
                 for constraint, bound in zip(table.boundary_constraints_ext(challenges), table.boundary_quotient_degree_bounds(challenges)):
                     eval = constraint.evaluate(point)
-                    quotient = eval / \
-                        (self.xfield.lift(self.fri.domain(index)) - self.xfield.one())
+                    quotient = eval * boundary_zerofier_inverse
                     terms += [quotient]
                     shift = self.max_degree - bound
                     terms += [quotient *
-                              self.xfield.lift(self.fri.domain(index) ^ shift)]
+                              (domain_point ^ shift)]
 
                 # transition
                 unit_distance = table.unit_distance(
@@ -510,41 +558,38 @@ class BrainfuckStark:
                     ext_acc_index+table.full_width-table.base_width)]
                 base_acc_index += table.base_width
                 ext_acc_index += table.full_width - table.base_width
+                if table.height != 0:
+                    transition_zerofier_inverse = (
+                        domain_point - omicron_inverse) * next(zerofier_inverses)
                 for constraint, bound in zip(table.transition_constraints_ext(challenges), table.transition_quotient_degree_bounds(challenges)):
                     eval = constraint.evaluate(
                         point + next_point)
-                    # If height == 0, then there is no subgroup where the transition polynomials should be zero.
-                    # The fast zerofier (based on group theory) needs a non-empty group.
-                    # Forcing it on an empty group generates a division by zero error.
                     if table.height == 0:
                         quotient = self.xfield.zero()
                     else:
-                        quotient = eval * self.xfield.lift(self.fri.domain(index) - table.omicron.inverse()) / (
-                            self.xfield.lift(self.fri.domain(index) ^ table.height) - self.xfield.one())
+                        quotient = eval * transition_zerofier_inverse
                     terms += [quotient]
                     shift = self.max_degree - bound
                     terms += [quotient *
-                              self.xfield.lift(self.fri.domain(index) ^ shift)]
+                              (domain_point ^ shift)]
 
                 # terminal
                 for constraint, bound in zip(table.terminal_constraints_ext(challenges, terminals), table.terminal_quotient_degree_bounds(challenges, terminals)):
                     eval = constraint.evaluate(point)
-                    quotient = eval / \
-                        (self.xfield.lift(self.fri.domain(index)) -
-                         self.xfield.lift(table.omicron.inverse()))
+                    quotient = eval * terminal_zerofier_inverse
                     terms += [quotient]
                     shift = self.max_degree - bound
                     terms += [quotient *
-                              self.xfield.lift(self.fri.domain(index) ^ shift)]
+                              (domain_point ^ shift)]
 
             for arg in self.permutation_arguments:
                 quotient = arg.evaluate_difference(
-                    points) / (self.xfield.lift(self.fri.domain(index)) - self.xfield.one())
+                    points) * boundary_zerofier_inverse
                 terms += [quotient]
                 degree_bound = arg.quotient_degree_bound()
                 shift = self.max_degree - degree_bound
                 terms += [quotient *
-                          self.xfield.lift(self.fri.domain(index) ^ shift)]
+                          (domain_point ^ shift)]
 
             assert (len(terms) == len(
                 weights)), f"length of terms ({len(terms)}) must be equal to length of weights ({len(weights)})"
@@ -558,13 +603,14 @@ class BrainfuckStark:
             combination_path = proof_stream.pull()
 
             # verify Merkle authentication path
+            position, slot = self.fri.locate(index, self.fri.domain.length)
             verifier_verdict = verifier_verdict and Merkle.verify(
-                combination_root, index, combination_path, combination_leaf)
+                combination_root, position, combination_path, combination_leaf)
             if not verifier_verdict:
                 return False
 
             # check equality
-            verifier_verdict = verifier_verdict and combination_leaf == inner_product
+            verifier_verdict = verifier_verdict and combination_leaf[slot] == inner_product
             if not verifier_verdict:
                 return False
 
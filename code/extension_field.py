@@ -3,9 +3,11 @@ from algebra import *
 
 
 class ExtensionFieldElement:
+    __slots__ = ('polynomial', 'field')
+
     def __init__(self, polynomial, field):
-        self.polynomial = Polynomial(
-            polynomial.coefficients[:polynomial.degree()+1])
+        # polynomials are trimmed, hence canonical, and never modified
+        self.polynomial = polynomial
         self.field = field
 
     def __add__(self, right):
@@ -36,11 +38,18 @@ class ExtensionFieldElement:
                 acc = acc * val
         return acc
 
+    # coefficient lists are trimmed on construction, hence canonical
     def __eq__(self, other):
-        return self.polynomial == other.polynomial
+        return self.polynomial.coefficients == other.polynomial.coefficients
 
     def __neq__(self, other):
-        return self.polynomial != other.polynomial
+        return self.polynomial.coefficients != other.polynomial.coefficients
+
+    def __hash__(self):
+        return hash(tuple(c.value for c in self.polynomial.coefficients))
+
+    def __reduce__(self):
+        return (ExtensionFieldElement, (self.polynomial, self.field))
 
     def __str__(self):
         return str(self.polynomial)
@@ -49,18 +58,24 @@ class ExtensionFieldElement:
         return bytes("|".join(str(c.polynomial) for c in self.polynomial.coefficients).encode())
 
     def is_zero(self):
-        return self.polynomial.is_zero()
+        return self.polynomial.coefficients == []
 
 
 class ExtensionField:
     def __init__(self, modulus):
         self.modulus = modulus
+        base_field = modulus.coefficients[0].field
+        self.small_elements = [ExtensionFieldElement(Polynomial([e]), self)
+                               for e in base_field.small_elements]
+
+    def __reduce__(self):
+        return (ExtensionField, (self.modulus,))
 
     def zero(self):
-        return ExtensionFieldElement(Polynomial([]), self)
+        return self.small_elements[0]
 
     def one(self):
-        return ExtensionFieldElement(Polynomial([self.modulus.coefficients[0].field.one()]), self)
+        return self.small_elements[1]
 
     def multiply(self, left, right):
         return ExtensionFieldElement((left.polynomial * right.polynomial) % self.modulus, self)
@@ -76,8 +91,6 @@ class ExtensionField:
 
     def inverse(self, operand):
         a, b, g = Polynomial.xgcd(operand.polynomial, self.modulus)
-        assert(a * operand.polynomial + b *
-               self.modulus == g), "bezout relation fails"
         return ExtensionFieldElement(a % self.modulus, self)
 
     def divide(self, left, right):
@@ -86,16 +99,7 @@ class ExtensionField:
         return ExtensionFieldElement(left.polynomial * a % self.modulus, self)
 
     def main():
-        # p = 2^64 - 2^32 + 1
-        #   = 1 + 3 * 5 * 17 * 257 * 65537 * 2^32
-        #   = 1 + 4294967295 * 2^32
-        p = 18446744069414584321  # 2^64 - 2^32 + 1
-        field = BaseField(p)
-        one = BaseFieldElement(1, field)
-        minus_one = BaseFieldElement(p-1, field)
-        # modulus = X^3 - X + 1
-        modulus = Polynomial([one, minus_one, field.zero(), one])
-        return ExtensionField(modulus)
+        return CubicExtensionField()
 
     def sample(self, byte_array):
         chunk_length = len(byte_array) // self.modulus.degree()
@@ -119,4 +123,236 @@ class ExtensionField:
         return self.polynomial.__str__()
 
     def __call__(self, integer):
-        return ExtensionFieldElement(Polynomial([BaseFieldElement(integer, self.modulus.coefficients[0].field)]), self)
+        element = self.modulus.coefficients[0].field(integer)
+        if element.value < len(self.small_elements):
+            return self.small_elements[element.value]
+        return ExtensionFieldElement(Polynomial([element]), self)
+
+
+class CubicExtensionFieldElement:
+    # an element a0 + a1*X + a2*X^2 of F_p[X] / (X^3 - X + 1), stored as the
+    # tuple of integers (a0, a1, a2), all canonical modulo p
+    __slots__ = ('values', 'field')
+
+    def __init__(self, values, field):
+        self.values = values
+        self.field = field
+
+    @property
+    def coefficients(self):
+        base_field = self.field.base_field
+        return [BaseFieldElement(v, base_field) for v in self.values]
+
+    @property
+    def polynomial(self):
+        return Polynomial(self.coefficients)
+
+    # base field operands act on the coefficients directly, without lifting;
+    # other operands (e.g. vectors) are left to their reflected operators
+    def __add__(self, right):
+        if right.__class__ is CubicExtensionFieldElement:
+            return self.field.add(self, right)
+        if right.__class__ is BaseFieldElement:
+            return self.field.add_base(self, right)
+        return NotImplemented
+
+    def __radd__(self, left):
+        return self.field.add_base(self, left)
+
+    def __mul__(self, right):
+        if right.__class__ is CubicExtensionFieldElement:
+            return self.field.multiply(self, right)
+        if right.__class__ is BaseFieldElement:
+            return self.field.scale(self, right)
+        return NotImplemented
+
+    def __rmul__(self, left):
+        return self.field.scale(self, left)
+
+    def __sub__(self, right):
+        if right.__class__ is CubicExtensionFieldElement:
+            return self.field.subtract(self, right)
+        if right.__class__ is BaseFieldElement:
+            return self.field.add_base(self, -right)
+        return NotImplemented
+
+    def __rsub__(self, left):
+        return self.field.add_base(self.field.negate(self), left)
+
+    def __truediv__(self, right):
+        if right.__class__ is CubicExtensionFieldElement:
+            return self.field.divide(self, right)
+        if right.__class__ is BaseFieldElement:
+            return self.field.scale(self, right.inverse())
+        return NotImplemented
+
+    def __rtruediv__(self, left):
+        return self.field.scale(self.field.inverse(self), left)
+
+    def __neg__(self):
+        return self.field.negate(self)
+
+    def inverse(self):
+        return self.field.inverse(self)
+
+    # modular exponentiation -- be sure to encapsulate in parentheses!
+    def __xor__(self, exponent):
+        acc = self.field.one()
+        for i in reversed(range(len(bin(exponent)[2:]))):
+            acc = self.field.square(acc)
+            if (1 << i) & exponent != 0:
+                acc = acc * self
+        return acc
+
+    def __eq__(self, other):
+        if other.__class__ is BaseFieldElement:
+            return self.values == (other.value, 0, 0)
+        return self.values == other.values
+
+    def __neq__(self, other):
+        return self.values != other.values
+
+    def __hash__(self):
+        return hash(self.values)
+
+    def __reduce__(self):
+        return (CubicExtensionFieldElement, (self.values, self.field))
+
+    def __str__(self):
+        return str(self.polynomial)
+
+    def __bytes__(self):
+        return bytes("|".join(str(v) for v in self.values).encode())
+
+    def is_zero(self):
+        return self.values == (0, 0, 0)
+
+
+class CubicExtensionField(ExtensionField):
+    # F_p[X] / (X^3 - X + 1) over p = 2^64 - 2^32 + 1, with the reduction
+    # X^3 = X - 1 and X^4 = X^2 - X hardcoded
+    def __init__(self):
+        self.base_field = BaseField.main()
+        self.p = self.base_field.p
+        one = self.base_field.one()
+        self.modulus = Polynomial([one, -one, self.base_field.zero(), one])
+        self.small_elements = [CubicExtensionFieldElement((e.value, 0, 0), self)
+                               for e in self.base_field.small_elements]
+
+        # Frobenius map a -> a^p is linear over the base field, so it is
+        # determined by the images of X and X^2
+        x = CubicExtensionFieldElement((0, 1, 0), self)
+        x_p = x ^ self.p
+        self.frobenius_images = (x_p.values, self.square(x_p).values)
+
+    def __reduce__(self):
+        return (CubicExtensionField, ())
+
+    def multiply(self, left, right):
+        p = self.p
+        a0, a1, a2 = left.values
+        b0, b1, b2 = right.values
+
+        # Karatsuba: six products instead of nine
+        m0 = a0 * b0
+        m1 = a1 * b1
+        m2 = a2 * b2
+        c1 = (a0 + a1) * (b0 + b1) - m0 - m1
+        c2 = (a0 + a2) * (b0 + b2) - m0 - m2 + m1
+        c3 = (a1 + a2) * (b1 + b2) - m1 - m2
+
+        # c0 + c1 X + c2 X^2 + c3 X^3 + m2 X^4
+        #   = (c0 - c3) + (c1 + c3 - m2) X + (c2 + m2) X^2
+        return CubicExtensionFieldElement(((m0 - c3) % p, (c1 + c3 - m2) % p, (c2 + m2) % p), self)
+
+    def square(self, operand):
+        p = self.p
+        a0, a1, a2 = operand.values
+        m2 = a2 * a2
+        c3 = 2 * a1 * a2
+        return CubicExtensionFieldElement(((a0 * a0 - c3) % p, (2 * a0 * a1 + c3 - m2) % p, (2 * a0 * a2 + a1 * a1 + m2) % p), self)
+
+    def scale(self, operand, base_field_element):
+        p = self.p
+        a0, a1, a2 = operand.values
+        b = base_field_element.value
+        return CubicExtensionFieldElement(((a0 * b) % p, (a1 * b) % p, (a2 * b) % p), self)
+
+    def add_base(self, operand, base_field_element):
+        a0, a1, a2 = operand.values
+        return CubicExtensionFieldElement(((a0 + base_field_element.value) % self.p, a1, a2), self)
+
+    def add(self, left, right):
+        p = self.p
+        a0, a1, a2 = left.values
+        b0, b1, b2 = right.values
+        return CubicExtensionFieldElement(((a0 + b0) % p, (a1 + b1) % p, (a2 + b2) % p), self)
+
+    def subtract(self, left, right):
+        p = self.p
+        a0, a1, a2 = left.values
+        b0, b1, b2 = right.values
+        return CubicExtensionFieldElement(((a0 - b0) % p, (a1 - b1) % p, (a2 - b2) % p), self)
+
+    def negate(self, operand):
+        p = self.p
+        a0, a1, a2 = operand.values
+        return CubicExtensionFieldElement(((-a0) % p, (-a1) % p, (-a2) % p), self)
+
+    def from_polynomial(self, polynomial):
+        values = [c.value for c in polynomial.coefficients]
+        assert(len(values) <= 3), "polynomial does not represent a cubic extension field element"
+        return CubicExtensionFieldElement(tuple(values + [0] * (3 - len(values))), self)
+
+    def frobenius(self, operand):
+        p = self.p
+        a0, a1, a2 = operand.values
+        (x0, x1, x2), (y0, y1, y2) = self.frobenius_images
+        return CubicExtensionFieldElement(((a0 + a1 * x0 + a2 * y0) % p, (a1 * x1 + a2 * y1) % p, (a1 * x2 + a2 * y2) % p), self)
+
+    def inverse(self, operand):
+        # a^-1 = a^p * a^(p^2) / N(a), where the norm N(a) = a * a^p * a^(p^2)
+        # lives in the base field; so one base field inversion suffices
+        assert(not operand.is_zero()), "cannot invert zero"
+        p = self.p
+        frobenius = self.frobenius(operand)
+        conjugate = frobenius * self.frobenius(frobenius)
+        a0, a1, a2 = operand.values
+        t0, t1, t2 = conjugate.values
+        # only the constant coefficient of a * conjugate is nonzero
+        norm_inverse = pow((a0 * t0 - a1 * t2 - a2 * t1) % p, -1, p)
+        return CubicExtensionFieldElement(((t0 * norm_inverse) % p, (t1 * norm_inverse) % p, (t2 * norm_inverse) % p), self)
+
+    def divide(self, left, right):
+        assert(not right.is_zero()), "divide by zero"
+        return left * self.inverse(right)
+
+    def batch_inverse(self, array):
+        assert(all(not a.is_zero() for a in array)
+               ), "batch inverse does not work when input contains a zero"
+        if len(array) == 0:
+            return []
+        products = [a for a in array]
+        for i in range(1, len(array)):
+            products[i] = products[i-1] * array[i]
+        acc = self.inverse(products[-1])
+        for i in reversed(range(1, len(array))):
+            products[i] = acc * products[i-1]
+            acc = acc * array[i]
+        products[0] = acc
+        return products
+
+    def sample(self, byte_array):
+        chunk_length = len(byte_array) // 3
+        return CubicExtensionFieldElement(tuple(self.base_field.sample(byte_array[i*chunk_length:(i+1)*chunk_length]).value for i in range(3)), self)
+
+    def lift(self, base_field_element):
+        if type(base_field_element) == CubicExtensionFieldElement:
+            return base_field_element
+        return CubicExtensionFieldElement((base_field_element.value, 0, 0), self)
+
+    def __call__(self, integer):
+        integer %= self.p
+        if integer < len(self.small_elements):
+            return self.small_elements[integer]
+        return CubicExtensionFieldElement((integer, 0, 0), self)
@@ -0,0 +1,559 @@
+import numpy as np
+import os
+from algebra import *
+from extension_field import CubicExtensionField, CubicExtensionFieldElement
+
+# p = 2^64 - 2^32 + 1
+P = 18446744069414584321
+P_U64 = np.uint64(P)
+EPSILON = np.uint64((1 << 32) - 1)  # 2^64 mod p = 2^32 - 1
+MASK32 = np.uint64((1 << 32) - 1)
+SHIFT32 = np.uint64(32)
+
+
+def reduce128(hi, lo):
+    # reduce hi * 2^64 + lo modulo p, using
+    #   2^64 = 2^32 - 1 mod p
+    #   2^96 = -1 mod p
+    hi_hi = hi >> SHIFT32
+    hi_lo = hi & MASK32
+
+    # lo - hi_hi; on borrow, correct by subtracting 2^32 - 1
+    t0 = lo - hi_hi
+    t0 -= (lo < hi_hi).astype(np.uint64) * EPSILON
+
+    # hi_lo * (2^32 - 1) does not overflow 64 bits
+    t1 = hi_lo * EPSILON
+
+    # t0 + t1; on carry, correct by adding 2^32 - 1
+    t2 = t0 + t1
+    t2 += (t2 < t1).astype(np.uint64) * EPSILON
+
+    return np.where(t2 >= P_U64, t2 - P_U64, t2)
+
+
+def scalar(value):
+    # a length-one array broadcasts like a scalar, but wraps silently on overflow
+    return np.full(1, value, dtype=np.uint64)
+
+
+def add(lhs, rhs):
+    total = lhs + rhs
+    total += (total < lhs).astype(np.uint64) * EPSILON
+    return np.where(total >= P_U64, total - P_U64, total)
+
+
+def subtract(lhs, rhs):
+    difference = lhs - rhs
+    difference -= (lhs < rhs).astype(np.uint64) * EPSILON
+    return difference
+
+
+def negate(operand):
+    return np.where(operand == 0, operand, P_U64 - operand)
+
+
+def multiply(lhs, rhs):
+    # schoolbook multiplication on 32-bit limbs yields the 128-bit product
+    lhs_lo = lhs & MASK32
+    lhs_hi = lhs >> SHIFT32
+    rhs_lo = rhs & MASK32
+    rhs_hi = rhs >> SHIFT32
+
+    lo_lo = lhs_lo * rhs_lo
+    lo_hi = lhs_lo * rhs_hi
+    hi_lo = lhs_hi * rhs_lo
+    hi_hi = lhs_hi * rhs_hi
+
+    middle = lo_hi + hi_lo
+    middle_carry = (middle < lo_hi).astype(np.uint64)
+
+    lo = lo_lo + (middle << SHIFT32)
+    lo_carry = (lo < lo_lo).astype(np.uint64)
+    hi = hi_hi + (middle >> SHIFT32) + (middle_carry << SHIFT32) + lo_carry
+
+    return reduce128(hi, lo)
+
+
+def power(base, exponent):
+    acc = np.ones_like(base)
+    for i in reversed(range(len(bin(exponent)[2:]))):
+        acc = multiply(acc, acc)
+        if (1 << i) & exponent != 0:
+            acc = multiply(acc, base)
+    return acc
+
+
+def inverse(operand):
+    # Fermat: a^(p-2) = a^-1, computed for all elements in parallel
+    return power(operand, P - 2)
+
+
+class FieldVector:
+    def __init__(self, values, field):
+        assert(field.p == P), "FieldVector only supports the field with p = 2^64 - 2^32 + 1"
+        self.values = np.asarray(values, dtype=np.uint64)
+        self.field = field
+
+    @staticmethod
+    def from_elements(elements, field=None):
+        if field is None:
+            assert(len(elements) != 0), "cannot infer field from empty list of elements"
+            field = elements[0].field
+        return FieldVector(np.fromiter((e.value for e in elements), dtype=np.uint64, count=len(elements)), field)
+
+    @staticmethod
+    def from_integers(integers, field):
+        return FieldVector(np.array([i % P for i in integers], dtype=np.uint64), field)
+
+    @staticmethod
+    def zeros(length, field):
+        return FieldVector(np.zeros(length, dtype=np.uint64), field)
+
+    def to_elements(self):
+        return [BaseFieldElement(int(v), self.field) for v in self.values]
+
+    def coerce(self, other):
+        if type(other) == FieldVector:
+            assert(len(other) == len(self)), "cannot combine field vectors of different lengths"
+            return other.values
+        if type(other) == int:
+            return scalar(other % P)
+        return scalar(other.value)
+
+    def rotate(self, shift):
+        # element i of the result is element i + shift of self (cyclically)
+        return FieldVector(np.roll(self.values, -shift), self.field)
+
+    def permute(self, indices):
+        # element i of the result is element indices[i] of self
+        return FieldVector(self.values[indices], self.field)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, key):
+        if type(key) == slice:
+            return FieldVector(self.values[key], self.field)
+        return BaseFieldElement(int(self.values[key]), self.field)
+
+    def __iter__(self):
+        return iter(self.to_elements())
+
+    # operations with extension field operands lift self first
+    def __add__(self, right):
+        if is_extension(right):
+            return ExtensionFieldVector.lift(self, right.field) + right
+        return FieldVector(add(self.values, self.coerce(right)), self.field)
+
+    def __radd__(self, left):
+        return self.__add__(left)
+
+    def __sub__(self, right):
+        if is_extension(right):
+            return ExtensionFieldVector.lift(self, right.field) - right
+        return FieldVector(subtract(self.values, self.coerce(right)), self.field)
+
+    def __rsub__(self, left):
+        if is_extension(left):
+            return left - ExtensionFieldVector.lift(self, left.field)
+        return FieldVector(subtract(self.coerce(left), self.values), self.field)
+
+    def __mul__(self, right):
+        if type(right) == ExtensionFieldVector:
+            return right * self
+        if type(right) == CubicExtensionFieldElement:
+            return ExtensionFieldVector([multiply(self.values, scalar(v)) for v in right.values], right.field)
+        return FieldVector(multiply(self.values, self.coerce(right)), self.field)
+
+    def __rmul__(self, left):
+        return self.__mul__(left)
+
+    def __truediv__(self, right):
+        if is_extension(right):
+            return right.inverse() * self
+        if type(right) == FieldVector:
+            return self * right.inverse()
+        if type(right) == int:
+            right = self.field(right)
+        assert(not right.is_zero()), "divide by zero"
+        return self * right.inverse()
+
+    def __neg__(self):
+        return FieldVector(negate(self.values), self.field)
+
+    # elementwise power -- be sure to encapsulate in parentheses!
+    def __xor__(self, exponent):
+        return FieldVector(power(self.values, exponent), self.field)
+
+    def inverse(self):
+        assert(np.all(self.values != 0)
+               ), "batch inverse does not work when input contains a zero"
+        return FieldVector(inverse(self.values), self.field)
+
+    def __eq__(self, other):
+        if type(other) != FieldVector:
+            return NotImplemented
+        return len(self) == len(other) and bool(np.all(self.values == other.values))
+
+    def __neq__(self, other):
+        return not self.__eq__(other)
+
+    def __str__(self):
+        return "[" + ",".join(str(v) for v in self.values) + "]"
+
+
+def is_extension(operand):
+    return type(operand) == ExtensionFieldVector or type(operand) == CubicExtensionFieldElement
+
+
+class ExtensionFieldVector:
+    # structure-of-arrays codeword over the cubic extension field: component
+    # j holds the coefficients of X^j of all elements
+    def __init__(self, components, field):
+        assert(type(field) == CubicExtensionField
+               ), "ExtensionFieldVector only supports the cubic extension field"
+        self.components = tuple(np.asarray(c, dtype=np.uint64)
+                                for c in components)
+        self.field = field
+
+    @staticmethod
+    def from_elements(elements, field=None):
+        if field is None:
+            assert(len(elements) != 0), "cannot infer field from empty list of elements"
+            field = elements[0].field
+        values = [field.lift(e).values for e in elements]
+        return ExtensionFieldVector([np.fromiter((v[j] for v in values), dtype=np.uint64, count=len(values)) for j in range(3)], field)
+
+    @staticmethod
+    def lift(vector, field):
+        zeros = np.zeros(len(vector), dtype=np.uint64)
+        return ExtensionFieldVector([vector.values, zeros, zeros], field)
+
+    @staticmethod
+    def zeros(length, field):
+        return ExtensionFieldVector([np.zeros(length, dtype=np.uint64) for j in range(3)], field)
+
+    def to_elements(self):
+        c0, c1, c2 = (c.tolist() for c in self.components)
+        return [CubicExtensionFieldElement((a0, a1, a2), self.field) for a0, a1, a2 in zip(c0, c1, c2)]
+
+    def coerce(self, other):
+        # returns the operand's components, or None if it is a base field operand
+        if type(other) == ExtensionFieldVector:
+            assert(len(other) == len(self)), "cannot combine field vectors of different lengths"
+            return other.components
+        if type(other) == CubicExtensionFieldElement:
+            return tuple(scalar(v) for v in other.values)
+        return None
+
+    def coerce_base(self, other):
+        if type(other) == FieldVector:
+            assert(len(other) == len(self)), "cannot combine field vectors of different lengths"
+            return other.values
+        if type(other) == int:
+            return scalar(other % P)
+        return scalar(other.value)
+
+    def rotate(self, shift):
+        return ExtensionFieldVector([np.roll(c, -shift) for c in self.components], self.field)
+
+    def permute(self, indices):
+        return ExtensionFieldVector([c[indices] for c in self.components], self.field)
+
+    def __len__(self):
+        return len(self.components[0])
+
+    def __getitem__(self, key):
+        if type(key) == slice:
+            return ExtensionFieldVector([c[key] for c in self.components], self.field)
+        return CubicExtensionFieldElement(tuple(int(c[key]) for c in self.components), self.field)
+
+    def __iter__(self):
+        return iter(self.to_elements())
+
+    def __add__(self, right):
+        components = self.coerce(right)
+        if components is None:
+            a0, a1, a2 = self.components
+            return ExtensionFieldVector([add(a0, self.coerce_base(right)), a1, a2], self.field)
+        return ExtensionFieldVector([add(a, b) for a, b in zip(self.components, components)], self.field)
+
+    def __radd__(self, left):
+        return self.__add__(left)
+
+    def __sub__(self, right):
+        components = self.coerce(right)
+        if components is None:
+            a0, a1, a2 = self.components
+            return ExtensionFieldVector([subtract(a0, self.coerce_base(right)), a1, a2], self.field)
+        return ExtensionFieldVector([subtract(a, b) for a, b in zip(self.components, components)], self.field)
+
+    def __rsub__(self, left):
+        return (-self) + left
+
+    def __neg__(self):
+        return ExtensionFieldVector([negate(c) for c in self.components], self.field)
+
+    def __mul__(self, right):
+        components = self.coerce(right)
+        if components is None:
+            b = self.coerce_base(right)
+            return ExtensionFieldVector([multiply(a, b) for a in self.components], self.field)
+        a0, a1, a2 = self.components
+        b0, b1, b2 = components
+
+        # Karatsuba, then reduce with X^3 = X - 1 and X^4 = X^2 - X
+        m0 = multiply(a0, b0)
+        m1 = multiply(a1, b1)
+        m2 = multiply(a2, b2)
+        c1 = subtract(subtract(multiply(add(a0, a1), add(b0, b1)), m0), m1)
+        c2 = add(subtract(subtract(multiply(add(a0, a2), add(b0, b2)), m0), m2), m1)
+        c3 = subtract(subtract(multiply(add(a1, a2), add(b1, b2)), m1), m2)
+        return ExtensionFieldVector([subtract(m0, c3), subtract(add(c1, c3), m2), add(c2, m2)], self.field)
+
+    def __rmul__(self, left):
+        return self.__mul__(left)
+
+    def __truediv__(self, right):
+        if type(right) == ExtensionFieldVector or type(right) == FieldVector:
+            return self * right.inverse()
+        if type(right) == int:
+            right = self.field(right)
+        assert(not right.is_zero()), "divide by zero"
+        return self * right.inverse()
+
+    def __rtruediv__(self, left):
+        return self.inverse() * left
+
+    # elementwise power -- be sure to encapsulate in parentheses!
+    def __xor__(self, exponent):
+        one = np.ones(len(self), dtype=np.uint64)
+        zero = np.zeros(len(self), dtype=np.uint64)
+        acc = ExtensionFieldVector([one, zero, zero], self.field)
+        for i in reversed(range(len(bin(exponent)[2:]))):
+            acc = acc * acc
+            if (1 << i) & exponent != 0:
+                acc = acc * self
+        return acc
+
+    def frobenius(self):
+        a0, a1, a2 = self.components
+        (x0, x1, x2), (y0, y1, y2) = [[scalar(v) for v in image]
+                                      for image in self.field.frobenius_images]
+        return ExtensionFieldVector([add(a0, add(multiply(a1, x0), multiply(a2, y0))),
+                                     add(multiply(a1, x1), multiply(a2, y1)),
+                                     add(multiply(a1, x2), multiply(a2, y2))], self.field)
+
+    def inverse(self):
+        # norm-based inversion, cf. CubicExtensionField.inverse; the base
+        # field inversions of all norms happen in parallel
+        assert(not np.any((self.components[0] == 0) & (self.components[1] == 0) & (self.components[2] == 0))
+               ), "batch inverse does not work when input contains a zero"
+        frobenius = self.frobenius()
+        conjugate = frobenius * frobenius.frobenius()
+        a0, a1, a2 = self.components
+        t0, t1, t2 = conjugate.components
+        norm = subtract(subtract(multiply(a0, t0), multiply(a1, t2)), multiply(a2, t1))
+        return conjugate * FieldVector(inverse(norm), self.field.base_field)
+
+    def __eq__(self, other):
+        if type(other) != ExtensionFieldVector:
+            return NotImplemented
+        return len(self) == len(other) and all(bool(np.all(a == b)) for a, b in zip(self.components, other.components))
+
+    def __neq__(self, other):
+        return not self.__eq__(other)
+
+    def __str__(self):
+        return "[" + ",".join(str(e) for e in self.to_elements()) + "]"
+
+
+def vectorize(codeword):
+    # turn a list of base or extension field elements into the matching vector
+    if type(codeword) == FieldVector or type(codeword) == ExtensionFieldVector:
+        return codeword
+    assert(len(codeword) != 0), "cannot infer field from empty codeword"
+    if type(codeword[0]) == CubicExtensionFieldElement:
+        return ExtensionFieldVector.from_elements(codeword)
+    return FieldVector.from_elements(codeword)
+
+
+def powers(base, length):
+    # [1, base, base^2, ..., base^(length-1)] by repeated doubling
+    acc = np.ones(1, dtype=np.uint64)
+    step = scalar(base)
+    while len(acc) < length:
+        acc = np.concatenate((acc, multiply(acc, step)))
+        step = multiply(step, step)
+    return acc[:length]
+
+
+# per-(root, n) twiddle arrays and per-n bit reversal permutations
+twiddle_arrays = {}
+bit_reversal_permutations = {}
+# permutations rotating bit-reversed codewords, keyed by (n, distance)
+rotation_permutations = {}
+# transforms of at least this many points use the four-step algorithm
+four_step_threshold = int(os.environ.get('FOUR_STEP_THRESHOLD', 1 << 20))
+# number of matrix rows the four-step algorithm transforms at once
+four_step_block = 1 << 8
+
+
+def bit_reversal_permutation(n):
+    permutation = bit_reversal_permutations.get(n)
+    if permutation is None:
+        log = n.bit_length() - 1
+        indices = np.arange(n, dtype=np.int64)
+        permutation = np.zeros(n, dtype=np.int64)
+        for b in range(log):
+            permutation |= ((indices >> b) & 1) << (log - 1 - b)
+        bit_reversal_permutations[n] = permutation
+    return permutation
+
+
+def rotation_permutation(n, distance):
+    # indices taking a bit-reversed codeword to the one whose value at point
+    # i is that of the original at point i + distance
+    permutation = rotation_permutations.get((n, distance))
+    if permutation is None:
+        reversal = bit_reversal_permutation(n)
+        permutation = reversal[(reversal + distance) % n]
+        rotation_permutations[(n, distance)] = permutation
+    return permutation
+
+
+def ntt_array(root, values):
+    # radix-2 NTT along the last axis of a uint64 array whose last dimension
+    # is a power of two, given the root as an integer; each butterfly stage
+    # is a single vectorized operation over the whole array
+    n = values.shape[-1]
+    if n <= 1:
+        return values.copy()
+    batch = values.shape[:-1]
+    if n >= four_step_threshold:
+        rows = values.reshape(-1, n)
+        return np.stack([four_step_ntt_array(root, row) for row in rows]).reshape(batch + (n,))
+    twiddles = twiddle_arrays.get((root, n))
+    if twiddles is None:
+        twiddles = powers(root, n // 2)
+        twiddle_arrays[(root, n)] = twiddles
+    values = values[..., bit_reversal_permutation(n)]
+    half = 1
+    while half < n:
+        blocks = values.reshape(batch + (n // (2 * half), 2, half))
+        u = blocks[..., 0, :]
+        v = multiply(blocks[..., 1, :], twiddles[::n // (2 * half)])
+        values = np.stack((add(u, v), subtract(u, v)),
+                          axis=-2).reshape(batch + (n,))
+        half *= 2
+    return values
+
+
+def dif_ntt_array(root, values):
+    # decimation-in-frequency NTT along the last axis: natural order in,
+    # bit-reversed order out, so no permutation pass is needed
+    n = values.shape[-1]
+    if n <= 1:
+        return values.copy()
+    twiddles = twiddle_arrays.get((root, n))
+    if twiddles is None:
+        twiddles = powers(root, n // 2)
+        twiddle_arrays[(root, n)] = twiddles
+    batch = values.shape[:-1]
+    half = n // 2
+    while half >= 1:
+        blocks = values.reshape(batch + (n // (2 * half), 2, half))
+        u = blocks[..., 0, :]
+        v = blocks[..., 1, :]
+        values = np.stack((add(u, v), multiply(subtract(u, v), twiddles[::n // (2 * half)])),
+                          axis=-2).reshape(batch + (n,))
+        half //= 2
+    return values
+
+
+def four_step_ntt_array(root, values, out=None):
+    # NTT of a 1-D array viewed as an n1 x n2 matrix A[j1][j2] = x[j1*n2 + j2]:
+    #  1. transform the columns (size n1, root^n2),
+    #  2. multiply entry (k1, j2) by root^(j2*k1),
+    #  3. transform the rows (size n2, root^n1),
+    # and read X[k1 + n1*k2] off the transposed result. Blocks of rows and
+    # columns are transformed at a time, so values and out may be memory
+    # mapped (np.memmap) buffers larger than RAM
+    n = len(values)
+    n1 = 1 << ((n.bit_length() - 1) // 2)
+    n2 = n // n1
+    if out is None:
+        out = np.empty(n, dtype=np.uint64)
+    matrix = values.reshape(n1, n2)
+    # out viewed as n2 x n1 holds first the twiddled column transforms
+    # (indexed [j2][k1]) and then the result (indexed [k2][k1])
+    scratch = out.reshape(n2, n1)
+    column_root = pow(root, n2, P)
+    row_root = pow(root, n1, P)
+    step = powers(root, n1)
+    for start in range(0, n2, four_step_block):
+        stop = min(start + four_step_block, n2)
+        columns = ntt_array(column_root, np.ascontiguousarray(
+            matrix[:, start:stop].T))
+        # twiddles root^(j2*k1) for j2 in [start, stop)
+        twiddles = [powers(pow(root, start, P), n1)]
+        for j2 in range(start + 1, stop):
+            twiddles += [multiply(twiddles[-1], step)]
+        scratch[start:stop, :] = multiply(columns, np.stack(twiddles))
+    for start in range(0, n1, four_step_block):
+        stop = min(start + four_step_block, n1)
+        rows = ntt_array(row_root, np.ascontiguousarray(
+            scratch[:, start:stop].T))
+        scratch[:, start:stop] = rows.T
+    return out
+
+
+def intt_array(root, values):
+    n = values.shape[-1]
+    n_inverse = pow(n, P - 2, P)
+    return multiply(ntt_array(pow(root, P - 2, P), values), scalar(n_inverse))
+
+
+def coset_ntt_array(offset, generator, coefficients, order, bit_reversed=False):
+    # evaluate the polynomials whose (at most `order`, power of two many)
+    # coefficients run along the last axis on offset * <generator>, where
+    # generator has the given order; the domain splits into order // length
+    # cosets
+    #   offset * generator^k * <generator^(order // length)>
+    # each of which takes one NTT of size length instead of one of size order
+    length = coefficients.shape[-1]
+    count = order // length
+    rows = [multiply(coefficients, powers(offset, length))]
+    step = powers(generator, length)
+    for k in range(1, count):
+        rows += [multiply(rows[-1], step)]
+    sub_generator = pow(generator, count, P)
+    if bit_reversed:
+        # index k + count * j sits at position rev(k) * length + rev(j): the
+        # cosets in bit-reversed order, each transformed into bit-reversed order
+        rows = [rows[k] for k in bit_reversal_permutation(count)]
+        values = dif_ntt_array(sub_generator, np.stack(rows, axis=-2))
+        return values.reshape(coefficients.shape[:-1] + (order,))
+    # element j of coset k lands at index k + count * j
+    values = ntt_array(sub_generator, np.stack(rows, axis=-2))
+    return np.swapaxes(values, -1, -2).reshape(coefficients.shape[:-1] + (order,))
+
+
+def lde_array(trace, randomizers, omicron, offset, omega, order, bit_reversed=False):
+    # rows of trace are columns of height n = trace.shape[-1]; interpolate
+    # them over <omicron>, add the randomizer polynomials (coefficients along
+    # the rows of randomizers) times X^n - 1, and evaluate on offset * <omega>
+    n = trace.shape[-1]
+    num_randomizers = randomizers.shape[-1]
+    coefficients = np.concatenate(
+        (intt_array(omicron, trace), np.zeros(trace.shape[:-1] + (num_randomizers,), dtype=np.uint64)), axis=-1)
+    coefficients[..., :num_randomizers] = subtract(
+        coefficients[..., :num_randomizers], randomizers)
+    coefficients[..., n:] = add(coefficients[..., n:], randomizers)
+    length = 1
+    while length < n + num_randomizers:
+        length *= 2
+    padded = np.zeros(trace.shape[:-1] + (length,), dtype=np.uint64)
+    padded[..., :n + num_randomizers] = coefficients
+    return coset_ntt_array(offset, omega, padded, order, bit_reversed)
@@ -9,53 +9,120 @@ from hashlib import blake2b
 
 from univariate import *
 
+try:
+    from field_vector import FieldVector, vectorize, rotation_permutation
+except ImportError:  # NumPy is optional; fall back to lists of elements
+    FieldVector = None
+
 
 class Fri:
     class Domain:
-        def __init__(self, offset, omega, length):
+        # rotation indices for bit-reversed codewords without NumPy, keyed by
+        # (length, distance)
+        rotations = {}
+        # point lists of bit-reversed domains, keyed like power_table
+        bit_reversed_points = {}
+
+        # with bit_reversed set, codewords over this domain hold the value at
+        # offset * omega^i in position bit_reverse_index(i, length)
+        def __init__(self, offset, omega, length, bit_reversed=False):
             self.offset = offset
             self.omega = omega
             self.length = length
+            self.bit_reversed = bit_reversed
 
         def __call__(self, index):
             return (self.omega ^ index) * self.offset
 
+        def position(self, index):
+            # position of the point with the given index in a codeword, and vice versa
+            if self.bit_reversed:
+                return bit_reverse_index(index, self.length)
+            return index
+
         def list(self):
-            return [(self.omega ^ i) * self.offset for i in range(self.length)]
+            if not self.bit_reversed:
+                return list(power_table(self.omega, self.length, self.offset))
+            key = (self.omega.__class__, self.omega, self.offset.__class__, self.offset, self.length)
+            points = Fri.Domain.bit_reversed_points.get(key)
+            if points is None:
+                points = bit_reverse(geometric_sequence(self.omega, self.length, self.offset))
+                Fri.Domain.bit_reversed_points[key] = points
+            return list(points)
+
+        def powers(self, exponent):
+            # x^exponent for every point x, in codeword order
+            return Fri.Domain(self.offset ^ exponent, self.omega ^ exponent, self.length, self.bit_reversed).list()
+
+        def rotate(self, codeword, distance):
+            # the codeword whose value at point i is that of codeword at point i + distance
+            if not self.bit_reversed:
+                if type(codeword) == list:
+                    return codeword[distance:] + codeword[:distance]
+                return codeword.rotate(distance)
+            if FieldVector is not None:
+                indices = rotation_permutation(self.length, distance)
+                if type(codeword) == list:
+                    return [codeword[i] for i in indices.tolist()]
+                return codeword.permute(indices)
+            key = (self.length, distance)
+            if key not in Fri.Domain.rotations:
+                Fri.Domain.rotations[key] = [self.position((self.position(j) + distance) % self.length)
+                                             for j in range(self.length)]
+            return [codeword[i] for i in Fri.Domain.rotations[key]]
+
+        def natural(self, values):
+            # codeword values in the order of the domain points
+            values = list(values)
+            if self.bit_reversed:
+                return bit_reverse(values)
+            return values
 
         def evaluate(self, polynomial):
-            coefficients = polynomial.scale(self.offset).coefficients
-            coefficients += [self.omega.field.zero()] * \
-                (self.length - len(coefficients))
-            return ntt(self.omega, coefficients)
+            return fast_coset_evaluate(polynomial, self.offset, self.omega, self.length, self.bit_reversed)
 
         def xevaluate(self, polynomial, xfield=None):
             if xfield == None:
                 assert(len(polynomial.coefficients) !=
                        0), "trying to xevaluate zero polynomial with no target field"
                 xfield = polynomial.coefficients[0].field
-            return fast_coset_evaluate(polynomial, xfield.lift(self.offset), xfield.lift(self.omega), self.length)
+            return fast_coset_evaluate(polynomial, xfield.lift(self.offset), xfield.lift(self.omega), self.length, self.bit_reversed)
 
         def interpolate(self, values):
-            return fast_coset_interpolate(self.offset, self.omega, values)
+            return fast_coset_interpolate(self.offset, self.omega, self.natural(values))
 
         def xinterpolate(self, values):
             xfield = values[0].field
-            return fast_coset_interpolate(xfield.lift(self.offset), xfield.lift(self.omega), values)
-
-    def __init__(self, offset, omega, initial_domain_length, expansion_factor, num_colinearity_tests, xfield):
-        self.domain = Fri.Domain(offset, omega, initial_domain_length)
+            return fast_coset_interpolate(xfield.lift(self.offset), xfield.lift(self.omega), self.natural(values))
+
+    def __init__(self, offset, omega, initial_domain_length, expansion_factor, num_colinearity_tests, xfield, bit_reversed=False, folding_factor=2):
+        # with bit_reversed, every codeword is kept (and committed to) in
+        # bit-reversed order; indices are translated when opening
+        self.domain = Fri.Domain(
+            offset, omega, initial_domain_length, bit_reversed)
+        self.bit_reversed = bit_reversed
         self.field = xfield
         self.expansion_factor = expansion_factor
         self.num_colinearity_tests = num_colinearity_tests
+        # every round folds cosets of this many points into one
+        self.folding_factor = folding_factor
 
-        assert(self.num_rounds() >= 1), "cannot do FRI with less than one round"
+        assert(folding_factor >= 2 and folding_factor & (folding_factor - 1)
+               == 0), "folding factor must be a power of two"
+        assert(initial_domain_length >=
+               folding_factor), "cannot fold codeword shorter than folding factor"
+        assert(self.num_rounds() >= 2
+               ), f"cannot do FRI with less than two rounds; fold less than {folding_factor} points at once or use a larger domain"
 
     def num_rounds(self):
+        # fold while the next codeword still has at least twice the
+        # expansion factor, and at least folding_factor, many values
         codeword_length = self.domain.length
-        num_rounds = 0
-        while codeword_length > self.expansion_factor:
-            codeword_length //= 2
+        if codeword_length <= self.expansion_factor:
+            return 0
+        num_rounds = 1
+        while codeword_length // self.folding_factor >= max(2 * self.expansion_factor, self.folding_factor):
+            codeword_length //= self.folding_factor
             num_rounds += 1
         return num_rounds
 
@@ -86,7 +153,7 @@ class Fri:
         return indices
 
     def eval_domain(self):
-        return [self.domain(i) for i in range(self.domain.length)]
+        return list(power_table(self.domain.omega, self.domain.length, self.domain.offset))
 
     def commit(self, codeword, proof_stream, round_index=0):
         one = self.field.one()
@@ -96,6 +163,14 @@ class Fri:
         trees = []
         codewords = []
 
+        if FieldVector is not None:
+            # fold on extension field vectors; x_inverses[i] = 1 / (offset * omega^i)
+            x_inverses = FieldVector.from_elements(
+                self.domain.list()).inverse()
+            two_inverse = two.inverse()
+            vector = vectorize(codeword)
+            codeword = vector.to_elements()
+
         # for each round
         for r in range(self.num_rounds()):
             N = len(codeword)
@@ -105,7 +180,7 @@ class Fri:
                    ), "error in commit: omega does not have the right order!"
 
             # compute and send Merkle root
-            tree = Merkle(codeword)
+            tree = Merkle(self.leafs(codeword))
             root = tree.root()
 
             # but don't send root in first round
@@ -123,12 +198,39 @@ class Fri:
             codewords += [codeword]
             trees += [tree]
 
-            # split and fold
-            codeword = [two.inverse() * ((one + alpha / (offset * (omega ^ i))) * codeword[i] + (
-                one - alpha / (offset * (omega ^ i))) * codeword[N//2 + i]) for i in range(N//2)]
-
-            omega = omega ^ 2
-            offset = offset ^ 2
+            # split and fold; folding by 2^s amounts to s binary folds with
+            # challenges alpha, alpha^2, alpha^4, ...
+            for t in range(self.folding_factor.bit_length() - 1):
+                if FieldVector is not None:
+                    N = len(vector)
+                    if self.bit_reversed:
+                        # points i and i + N/2 sit next to each other
+                        left, right = vector[0::2], vector[1::2]
+                        x_inverses = x_inverses[0::2]
+                    else:
+                        left, right = vector[:N//2], vector[N//2:]
+                        x_inverses = x_inverses[:N//2]
+                    vector = ((left + right) + (x_inverses * alpha)
+                              * (left - right)) * two_inverse
+                    # the next domain is the square of the first half of this one
+                    x_inverses = x_inverses ^ 2
+                elif self.bit_reversed:
+                    N = len(codeword)
+                    points = power_table(omega, N//2, offset)
+                    codeword = [two.inverse() * ((one + alpha / points[bit_reverse_index(j, N//2)]) * codeword[2*j] + (
+                        one - alpha / points[bit_reverse_index(j, N//2)]) * codeword[2*j + 1]) for j in range(N//2)]
+                else:
+                    N = len(codeword)
+                    points = power_table(omega, N//2, offset)
+                    codeword = [two.inverse() * ((one + alpha / points[i]) * codeword[i] + (
+                        one - alpha / points[i]) * codeword[N//2 + i]) for i in range(N//2)]
+
+                omega = omega ^ 2
+                offset = offset ^ 2
+                alpha = alpha ^ 2
+
+            if FieldVector is not None:
+                codeword = vector.to_elements()
 
         # send last codeword
         proof_stream.push(codeword)
@@ -138,42 +240,36 @@ class Fri:
 
         return codewords, trees
 
-    def query(self, current_tree, next_tree, c_indices, proof_stream):
-        # infer a and b indices
-        a_indices = [index for index in c_indices]
-        b_indices = [index + len(current_tree.leafs) //
-                     2 for index in c_indices]
-
-        # reveal leafs
-        for s in range(self.num_colinearity_tests):
-            proof_stream.push(
-                (current_tree.leafs[a_indices[s]], current_tree.leafs[b_indices[s]], next_tree.leafs[c_indices[s]]))
-
-        # reveal authentication paths
-        for s in range(self.num_colinearity_tests):
-            proof_stream.push(current_tree.open(a_indices[s]))
-            proof_stream.push(current_tree.open(b_indices[s]))
-            proof_stream.push(next_tree.open(c_indices[s]))
-
-        return a_indices + b_indices
-
-    def query_last(self, current_tree, last_codeword, c_indices, proof_stream):
-        # infer a and b indices
-        a_indices = [index for index in c_indices]
-        b_indices = [index + len(current_tree.leafs) //
-                     2 for index in c_indices]
-
-        # reveal leafs
-        for s in range(self.num_colinearity_tests):
-            proof_stream.push(
-                (current_tree.leafs[a_indices[s]], current_tree.leafs[b_indices[s]], last_codeword[c_indices[s]]))
-
-        # reveal authentication paths
-        for s in range(self.num_colinearity_tests):
-            proof_stream.push(current_tree.open(a_indices[s]))
-            proof_stream.push(current_tree.open(b_indices[s]))
-
-        return a_indices + b_indices
+    def position(self, index, length):
+        # position of point index in a codeword of the given length
+        if self.bit_reversed:
+            return bit_reverse_index(index, length)
+        return index
+
+    def leafs(self, codeword):
+        # Merkle leafs of a codeword: one tuple per coset of points that fold
+        # into the same point c, holding the values at c + j * length / folding_factor
+        k = self.folding_factor
+        M = len(codeword) // k
+        if self.bit_reversed:
+            # the coset of c fills positions k * rev(c) up to k * rev(c) + k - 1
+            return [tuple(codeword[k*p + bit_reverse_index(j, k)] for j in range(k)) for p in range(M)]
+        return [tuple(codeword[c::M]) for c in range(M)]
+
+    def locate(self, index, length):
+        # position of the leaf holding point index in a codeword of the given
+        # length, and the slot of the point within that leaf
+        M = length // self.folding_factor
+        return self.position(index % M, M), index // M
+
+    def query(self, tree, c_indices, proof_stream):
+        # reveal the cosets folding into c_indices, and their authentication paths
+        M = tree.num_leafs
+        positions = [self.position(index, M) for index in c_indices]
+        for position in positions:
+            proof_stream.push(tree.leafs[position])
+        for position in positions:
+            proof_stream.push(tree.open(position))
 
     def prove(self, codeword, proof_stream):
         assert(self.domain.length == len(
@@ -188,19 +284,18 @@ class Fri:
         indices = [index for index in top_level_indices]
 
         # query phase
-        for i in range(len(trees)-1):
-            indices = [index % (len(codewords[i])//2)
+        for i in range(len(trees)):
+            indices = [index % (len(codewords[i]) // self.folding_factor)
                        for index in indices]  # fold
-            self.query(trees[i], trees[i+1], indices, proof_stream)
-        indices = [index % (len(codewords[-1]))
-                   for index in indices]  # fold for last codeword
-        self.query_last(trees[-1], codewords[-1], indices, proof_stream)
+            self.query(trees[i], indices, proof_stream)
 
         return top_level_indices
 
     def verify(self, proof_stream, root):
         omega = self.field.lift(self.domain.omega)
         offset = self.field.lift(self.domain.offset)
+        one = self.field.one()
+        two_inverse = (one + one).inverse()
 
         # extract all roots and alphas
         roots = [root]
@@ -216,7 +311,7 @@ class Fri:
         # check if it matches the given root
         # how?! We don't have the salts!
         # We don't need the salts if we use *unsalted* merkle trees :-)
-        if roots[-1] != Merkle(last_codeword).root():
+        if roots[-1] != Merkle(self.leafs(last_codeword)).root():
             print("last codeword is not well formed")
             return False
 
@@ -225,23 +320,19 @@ class Fri:
         last_omega = omega
         last_offset = offset
         for r in range(self.num_rounds()-1):
-            last_omega = last_omega ^ 2
-            last_offset = last_offset ^ 2
+            last_omega = last_omega ^ self.folding_factor
+            last_offset = last_offset ^ self.folding_factor
 
         # assert that last_omega has the right order
         assert(last_omega.inverse() == last_omega ^ (
             len(last_codeword)-1)), "omega does not have right order"
 
-        # compute interpolant
-        last_domain = [last_offset * (last_omega ^ i)
-                       for i in range(len(last_codeword))]
-        poly = Polynomial.interpolate_domain(last_domain, last_codeword)
-        #coefficients = intt(last_omega, last_codeword)
-        #poly = Polynomial(coefficients).scale(last_offset.inverse())
-
-        # verify by  evaluating
-        assert(poly.evaluate_domain(last_domain) ==
-               last_codeword), "re-evaluated codeword does not match original!"
+        # compute interpolant with a coset intt; the codeword is low degree
+        # iff the coefficients beyond the degree bound vanish
+        last_values = list(last_codeword)
+        if self.bit_reversed:
+            last_values = bit_reverse(last_values)
+        poly = fast_coset_interpolate(last_offset, last_omega, last_values)
         if poly.degree() > degree:
             # print("last codeword does not correspond to polynomial of low enough degree")
             # print("observed degree:", poly.degree())
@@ -253,67 +344,53 @@ class Fri:
 
         # get indices
         top_level_indices = self.sample_indices(proof_stream.verifier_fiat_shamir(
-        ), self.domain.length >> 1, self.domain.length >> (self.num_rounds()-1), self.num_colinearity_tests)
+        ), self.domain.length // self.folding_factor, len(last_codeword), self.num_colinearity_tests)
 
         # for every pair of consecutive rounds, check consistency of subsequent layers
+        k = self.folding_factor
+        previous_indices = None
         for r in range(self.num_rounds()-1):
-
-            # fold c indices
-            c_indices = [index % (self.domain.length >> (r+1))
-                         for index in top_level_indices]
-
-            # infer a and b indices
-            a_indices = [index for index in c_indices]
-            b_indices = [index + (self.domain.length >> (r+1))
-                         for index in a_indices]
-
-            # read values and check colinearity
-            aa = []
-            bb = []
-            cc = []
-            for s in range(self.num_colinearity_tests):
-                (ay, by, cy) = proof_stream.pull()
-                aa += [ay]
-                bb += [by]
-                cc += [cy]
-
-                # colinearity check
-                ax = offset * (omega ^ a_indices[s])
-                bx = offset * (omega ^ b_indices[s])
-                cx = alphas[r]
-                if test_colinearity([(ax, ay), (bx, by), (cx, cy)]) == False:
-                    print("colinearity check failure")
-                    return False
+            M = (self.domain.length // (k ** r)) // k
+            c_indices = [index % M for index in top_level_indices]
+            leafs = [proof_stream.pull()
+                     for s in range(self.num_colinearity_tests)]
+
+            # the values folded in the previous round must be in these cosets
+            if previous_indices is not None:
+                for s in range(self.num_colinearity_tests):
+                    if leafs[s][previous_indices[s] // M] != folded[s]:
+                        print("folded value does not match coset of next round")
+                        return False
 
             # verify authentication paths
-            for i in range(self.num_colinearity_tests):
-                path = proof_stream.pull()
-                if Merkle.verify(roots[r], a_indices[i], path, aa[i]) == False:
-                    print("merkle authentication path verification fails for aa")
-                    return False
+            for s in range(self.num_colinearity_tests):
                 path = proof_stream.pull()
-                if Merkle.verify(roots[r], b_indices[i], path, bb[i]) == False:
-                    print("merkle authentication path verification fails for bb")
+                if Merkle.verify(roots[r], self.position(c_indices[s], M), path, leafs[s]) == False:
+                    print("merkle authentication path verification fails for coset")
                     return False
-                if r+1 != self.num_rounds()-1:
-                    path = proof_stream.pull()
-                    if Merkle.verify(roots[r+1], c_indices[i], path, cc[i]) == False:
-                        print("merkle authentication path verification fails for cc")
-                        return False
 
-            # if we are in the last round, we did not check the Merkle paths
-            # but we did get the last codeword, so we should check the "leafs"
-            # against that instead
-            if r+1 == self.num_rounds()-1:
-                for i in range(self.num_colinearity_tests):
-                    if cc[i] != last_codeword[c_indices[i]]:
-                        print(
-                            "leafs in last round do not correspond to last codeword")
-                        return False
-
-            # square omega and offset to prepare for next round
-            omega = omega ^ 2
-            offset = offset ^ 2
+            # fold: evaluate in alpha the polynomial interpolating the coset
+            if k == 2:
+                # the line through (x, ay) and (-x, by) takes at alpha the value
+                #   ((1 + alpha / x) * ay + (1 - alpha / x) * by) / 2
+                x_inverses = batch_inverse(
+                    [offset * (omega ^ c) for c in c_indices])
+                folded = [two_inverse * ((one + alphas[r] * xi) * ay + (one - alphas[r] * xi) * by)
+                          for xi, (ay, by) in zip(x_inverses, leafs)]
+            else:
+                zeta = omega ^ M
+                folded = [fast_coset_interpolate(offset * (omega ^ c), zeta, list(leaf)).evaluate(alphas[r])
+                          for c, leaf in zip(c_indices, leafs)]
+
+            previous_indices = c_indices
+            omega = omega ^ k
+            offset = offset ^ k
+
+        # the last folded values are in the last codeword
+        for s in range(self.num_colinearity_tests):
+            if last_codeword[self.position(previous_indices[s], len(last_codeword))] != folded[s]:
+                print("leafs in last round do not correspond to last codeword")
+                return False
 
         # all checks passed
         return True
@@ -184,7 +184,7 @@ class InstructionTable(Table):
         extended_matrix = []
         permutation_running_product = processor_instruction_permutation_initial
         evaluation_running_sum = zero
-        previous_address = -one
+        previous_address = -field.one()
 
         # loop over all rows of table
         num_padded_rows = 0
@@ -193,7 +193,7 @@ class InstructionTable(Table):
             new_row = []
 
             # first, copy over existing row
-            new_row = [xfield.lift(nr) for nr in row]
+            new_row = [nr for nr in row]
 
             if new_row[InstructionTable.current_instruction].is_zero():
                 num_padded_rows += 1
@@ -203,7 +203,7 @@ class InstructionTable(Table):
             # make sure the new row is not padding
             if not new_row[InstructionTable.current_instruction].is_zero():
                 # and that the instruction address didn't just change
-                if i > 0 and new_row[InstructionTable.address] == xfield.lift(self.matrix[i-1][InstructionTable.address]):
+                if i > 0 and new_row[InstructionTable.address] == self.matrix[i-1][InstructionTable.address]:
                     permutation_running_product *= alpha - \
                         a * new_row[InstructionTable.address] - \
                         b * new_row[InstructionTable.current_instruction] - \
@@ -226,8 +226,6 @@ class InstructionTable(Table):
 
         self.field = xfield
         self.matrix = extended_matrix
-        self.codewords = [[xfield.lift(c) for c in cdwd]
-                          for cdwd in self.codewords]
 
         self.permutation_terminal = permutation_running_product
         self.evaluation_terminal = evaluation_running_sum
@@ -87,7 +87,7 @@ class IOTable(Table):
         # loop over all rows of table
         for i in range(len(self.matrix)):
             row = self.matrix[i]
-            new_row = [xfield.lift(nr) for nr in row]
+            new_row = [nr for nr in row]
 
             io_running_evaluation = io_running_evaluation * \
                 iota + new_row[IOTable.column]
@@ -103,8 +103,6 @@ class IOTable(Table):
 
         self.field = xfield
         self.matrix = extended_matrix
-        self.codewords = [[xfield.lift(c) for c in cdwd]
-                          for cdwd in self.codewords]
         self.evaluation_terminal = evaluation_terminal
 
 
@@ -187,7 +187,7 @@ class MemoryTable(Table):
         # loop over all rows of table
         for i in range(len(self.matrix)):
             row = self.matrix[i]
-            new_row = [xfield.lift(nr) for nr in row]
+            new_row = [nr for nr in row]
 
             new_row += [memory_permutation_running_product]
 
@@ -201,6 +201,4 @@ class MemoryTable(Table):
 
         self.matrix = extended_matrix
         self.field = xfield
-        self.codewords = [[xfield.lift(c) for c in cdwd]
-                          for cdwd in self.codewords]
         self.permutation_terminal = memory_permutation_running_product
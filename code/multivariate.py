@@ -111,7 +111,8 @@ class MPolynomial:
             assert(len(point) == len(
                 k)), f"number of elements in point {len(point)} does not match with number of variables {len(k)} for polynomial {str(self)}"
             for i in range(len(k)):
-                prod = prod * (point[i] ^ k[i])
+                if k[i] != 0:
+                    prod = prod * (point[i] ^ k[i])
             acc = acc + prod
         return acc
 
@@ -1,4 +1,173 @@
 from univariate import *
+from extension_field import CubicExtensionField, CubicExtensionFieldElement
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import os
+
+try:
+    from field_vector import FieldVector, ExtensionFieldVector, ntt_array, dif_ntt_array, intt_array, coset_ntt_array, lde_array, powers, P
+    import numpy as np
+except ImportError:  # NumPy is optional; fall back to the reference transforms
+    FieldVector = None
+
+# "numpy" runs base field transforms as vectorized butterfly stages, "python"
+# forces the reference code; select with the NTT_BACKEND environment variable
+ntt_backend = os.environ.get(
+    'NTT_BACKEND', 'numpy' if FieldVector is not None else 'python')
+# below this length the conversion to and from arrays is not worth it
+numpy_ntt_threshold = 16
+# transform the three components of extension field vectors on this many threads
+xntt_workers = int(os.environ.get('XNTT_WORKERS', '1'))
+
+
+# twiddle tables keyed by (root type, root, n); entry i holds root^i for i < n/2
+twiddle_cache = {}
+
+
+def twiddle_factors(primitive_root, n):
+    key = (primitive_root.__class__, primitive_root, n)
+    table = twiddle_cache.get(key)
+    if table is None:
+        table = [primitive_root.field.one()]
+        for i in range(1, n // 2):
+            table += [table[-1] * primitive_root]
+        twiddle_cache[key] = table
+    return table
+
+
+def bit_reverse_index(index, n):
+    # index with its log2(n) bits reversed
+    bits = n.bit_length() - 1
+    if bits == 0:
+        return 0
+    return int(format(index, f"0{bits}b")[::-1], 2)
+
+
+def bit_reverse(values):
+    # permutes values in place into bit-reversed index order
+    n = len(values)
+    j = 0
+    for i in range(1, n):
+        bit = n >> 1
+        while j & bit:
+            j ^= bit
+            bit >>= 1
+        j ^= bit
+        if i < j:
+            values[i], values[j] = values[j], values[i]
+    return values
+
+
+def ntt_in_place(primitive_root, values):
+    # iterative radix-2 Cooley-Tukey; assumes the root was already validated
+    n = len(values)
+    twiddles = twiddle_factors(primitive_root, n)
+    bit_reverse(values)
+    half = 1
+    while half < n:
+        stride = n // (2 * half)
+        for start in range(0, n, 2 * half):
+            for j in range(start, start + half):
+                u = values[j]
+                v = values[j + half]
+                if j != start:
+                    v = v * twiddles[(j - start) * stride]
+                values[j] = u + v
+                values[j + half] = u - v
+        half *= 2
+    return values
+
+
+def dif_ntt_in_place(primitive_root, values):
+    # iterative radix-2 Gentleman-Sande: natural order in, bit-reversed
+    # order out, so no permutation pass is needed
+    n = len(values)
+    twiddles = twiddle_factors(primitive_root, n)
+    half = n // 2
+    while half >= 1:
+        stride = n // (2 * half)
+        for start in range(0, n, 2 * half):
+            for j in range(start, start + half):
+                u = values[j]
+                v = values[j + half]
+                values[j] = u + v
+                if j != start:
+                    values[j + half] = (u - v) * twiddles[(j - start) * stride]
+                else:
+                    values[j + half] = u - v
+        half //= 2
+    return values
+
+
+def numpy_backend(primitive_root, values):
+    if ntt_backend != 'numpy' or FieldVector is None:
+        return False
+    if type(values) == FieldVector:
+        return True
+    return len(values) >= numpy_ntt_threshold and primitive_root.__class__ is BaseFieldElement \
+        and primitive_root.field.p == P and values[0].__class__ is BaseFieldElement
+
+
+def numpy_transform(transform, primitive_root, values):
+    # field vectors stay vectors; lists of elements come back as lists
+    if type(values) == FieldVector:
+        return FieldVector(transform(primitive_root.value, values.values), values.field)
+    vector = FieldVector.from_elements(values)
+    return FieldVector(transform(primitive_root.value, vector.values), vector.field).to_elements()
+
+
+def base_root(element):
+    # the base field element that element is (a lift of), or None
+    if element.__class__ is BaseFieldElement:
+        return element
+    if element.__class__ is CubicExtensionFieldElement and element.values[1] == 0 and element.values[2] == 0:
+        return BaseFieldElement(element.values[0], element.field.base_field)
+    return None
+
+
+def extension_field_of(values):
+    # the cubic extension field if any of the values lives there, or None
+    if FieldVector is not None and type(values) == FieldVector:
+        return None
+    for v in values:
+        if v.__class__ is CubicExtensionFieldElement:
+            return v.field
+    return None
+
+
+def decompose(values, base_field):
+    # split cubic extension (or base) field elements into three base field lists
+    components = [[], [], []]
+    for v in values:
+        if v.__class__ is CubicExtensionFieldElement:
+            coefficients = v.values
+        else:
+            coefficients = (v.value, 0, 0)
+        for k in range(3):
+            components[k] += [BaseFieldElement(coefficients[k], base_field)]
+    return components
+
+
+def recompose(components, xfield):
+    return [CubicExtensionFieldElement((a.value, b.value, c.value), xfield) for a, b, c in zip(*components)]
+
+
+def map_components(function, components):
+    if xntt_workers > 1:
+        with ThreadPoolExecutor(max_workers=xntt_workers) as executor:
+            return list(executor.map(function, components))
+    return [function(c) for c in components]
+
+
+def xntt(primitive_root, values, xfield):
+    # the root lives in the base field, so the transform acts on each
+    # coefficient component of the extension field values separately
+    components = decompose(values, xfield.base_field)
+    return recompose(map_components(lambda c: ntt(primitive_root, c), components), xfield)
+
+
+def xintt(primitive_root, values, xfield):
+    components = decompose(values, xfield.base_field)
+    return recompose(map_components(lambda c: intt(primitive_root, c), components), xfield)
 
 
 def ntt(primitive_root, values):
@@ -15,12 +184,14 @@ def ntt(primitive_root, values):
     assert(primitive_root ^ (len(values)//2) != field.one()
            ), f"primitive root {primitive_root} is not primitive nth root of unity, where n is {len(values)}; powered to half-n the root gives {primitive_root^(len(values)//2)}"
 
-    half = len(values) // 2
+    xfield = extension_field_of(values)
+    if xfield is not None and base_root(primitive_root) is not None:
+        return xntt(base_root(primitive_root), values, xfield)
 
-    odds = ntt(primitive_root ^ 2, values[1::2])
-    evens = ntt(primitive_root ^ 2, values[::2])
+    if numpy_backend(primitive_root, values):
+        return numpy_transform(ntt_array, primitive_root, values)
 
-    return [evens[i % half] + (primitive_root ^ i) * odds[i % half] for i in range(len(values))]
+    return ntt_in_place(primitive_root, [v for v in values])
 
 
 def intt(primitive_root, values):
@@ -35,10 +206,18 @@ def intt(primitive_root, values):
     assert(primitive_root ^ (len(values)//2) != primitive_root.field.one()
            ), "supplied root is not primitive root of supplied order"
 
+    xfield = extension_field_of(values)
+    if xfield is not None and base_root(primitive_root) is not None:
+        return xintt(base_root(primitive_root), values, xfield)
+
+    if numpy_backend(primitive_root, values):
+        return numpy_transform(intt_array, primitive_root, values)
+
     field = values[0].field
     ninv = field(len(values)).inverse()
 
-    transformed_values = ntt(primitive_root.inverse(), values)
+    transformed_values = ntt_in_place(
+        primitive_root.inverse(), [v for v in values])
     return [ninv*tv for tv in transformed_values]
 
 
@@ -79,6 +258,72 @@ def fast_multiply(lhs, rhs, primitive_root, root_order):
     return Polynomial(product_coefficients[0:(degree+1)])
 
 
+def root_of_unity(field, order):
+    # a primitive root of the given power-of-two order for NTTs over field
+    # (or over its base field), or None if there is none we know of
+    if field.__class__ is CubicExtensionField:
+        field = field.base_field
+    if not isinstance(field, BaseField) or field.p != GoldilocksField.P or order > 1 << 32:
+        return None
+    return field.primitive_nth_root(order)
+
+
+def reversed_inverse(denominator, precision):
+    # coefficients of 1 / rev(denominator) mod X^precision, by Newton iteration
+    #   g <- g * (2 - rev(denominator) * g) mod X^(2k)
+    degree = denominator.degree()
+    reversed_coefficients = denominator.coefficients[degree::-1]
+    field = reversed_coefficients[0].field
+    root_order = 1 << (2 * precision).bit_length()
+    root = root_of_unity(field, root_order)
+    two = field.one() + field.one()
+
+    inverse = Polynomial([reversed_coefficients[0].inverse()])
+    k = 1
+    while k < precision:
+        k = min(2 * k, precision)
+        product = fast_multiply(Polynomial(
+            reversed_coefficients[:k]), inverse, root, root_order).coefficients[:k]
+        correction = [-c for c in product] + \
+            [field.zero()] * (k - len(product))
+        correction[0] = correction[0] + two
+        inverse = Polynomial(fast_multiply(
+            inverse, Polynomial(correction), root, root_order).coefficients[:k])
+
+    coefficients = inverse.coefficients[:precision]
+    return coefficients + [field.zero()] * (precision - len(coefficients))
+
+
+def fast_divide(numerator, denominator, inverse=None):
+    # quotient and remainder via rev(quotient) = rev(numerator) / rev(denominator);
+    # pass the output of reversed_inverse to reuse it for a repeated denominator
+    assert(denominator.degree() != -1), "cannot divide by zero polynomial"
+    if numerator.degree() < denominator.degree():
+        return (Polynomial([]), numerator)
+
+    field = denominator.coefficients[0].field
+    degree = denominator.degree()
+    quotient_length = numerator.degree() - degree + 1
+    if inverse is None or len(inverse) < quotient_length:
+        inverse = reversed_inverse(denominator, quotient_length)
+
+    root_order = 1 << (2 * (numerator.degree() + 1)).bit_length()
+    root = root_of_unity(field, root_order)
+
+    reversed_numerator = numerator.coefficients[numerator.degree(
+    )::-1][:quotient_length]
+    reversed_quotient = fast_multiply(Polynomial(reversed_numerator), Polynomial(
+        inverse[:quotient_length]), root, root_order).coefficients[:quotient_length]
+    reversed_quotient += [field.zero()] * \
+        (quotient_length - len(reversed_quotient))
+    quotient = Polynomial(reversed_quotient[::-1])
+
+    product = fast_multiply(quotient, denominator, root, root_order)
+    remainder = Polynomial([n - p for n, p in zip(numerator.coefficients[:degree],
+                                                  product.coefficients[:degree] + [field.zero()] * degree)])
+    return quotient, remainder
+
+
 def fast_zerofier(domain, primitive_root, root_order):
     assert(primitive_root ^ root_order == primitive_root.field.one()
            ), "supplied root does not have supplied order"
@@ -98,77 +343,311 @@ def fast_zerofier(domain, primitive_root, root_order):
     return fast_multiply(left, right, primitive_root, root_order)
 
 
-def fast_evaluate(polynomial, domain, primitive_root, root_order):
-    assert(primitive_root ^ root_order == primitive_root.field.one()
-           ), "supplied root does not have supplied order"
-    assert(primitive_root ^ (root_order//2) != primitive_root.field.one()
-           ), "supplied root is not primitive root of supplied order"
-
-    if len(domain) == 0:
-        return []
-
-    if len(domain) == 1:
-        return [polynomial.evaluate(domain[0])]
-
-    half = len(domain) // 2
-
-    left_zerofier = fast_zerofier(domain[:half], primitive_root, root_order)
-    right_zerofier = fast_zerofier(domain[half:], primitive_root, root_order)
+class SubproductTree:
+    # binary tree over a domain whose nodes hold the zerofiers of their
+    # subdomains; build once and reuse it for every interpolation and
+    # evaluation on the same domain
+    def __init__(self, domain, primitive_root, root_order):
+        assert(primitive_root ^ root_order == primitive_root.field.one()
+               ), "supplied root does not have supplied order"
+        assert(primitive_root ^ (root_order//2) != primitive_root.field.one()
+               ), "supplied root is not primitive root of supplied order"
+        self.build(domain, primitive_root, root_order)
+
+    def build(self, domain, primitive_root, root_order):
+        self.domain = domain
+        self.primitive_root = primitive_root
+        self.root_order = root_order
+        self.left = None
+        self.right = None
+        # inverses of the sibling zerofier on each half, computed on first use
+        self.left_offset_inverse = None
+        self.right_offset_inverse = None
+        # reversed inverse of the zerofier, for fast remainders
+        self.zerofier_inverse = None
+
+        if len(domain) == 0:
+            self.zerofier = Polynomial([])
+        elif len(domain) == 1:
+            self.zerofier = Polynomial([-domain[0], primitive_root.field.one()])
+        else:
+            half = len(domain) // 2
+            self.left = SubproductTree.__new__(SubproductTree)
+            self.left.build(domain[:half], primitive_root, root_order)
+            self.right = SubproductTree.__new__(SubproductTree)
+            self.right.build(domain[half:], primitive_root, root_order)
+            self.zerofier = fast_multiply(
+                self.left.zerofier, self.right.zerofier, primitive_root, root_order)
+
+    def evaluate(self, polynomial):
+        if len(self.domain) == 0:
+            return []
+
+        if len(self.domain) == 1:
+            return [polynomial.evaluate(self.domain[0])]
+
+        left = self.left.evaluate(self.left.remainder(polynomial))
+        right = self.right.evaluate(self.right.remainder(polynomial))
+
+        return left + right
+
+    def remainder(self, polynomial):
+        # polynomial mod the zerofier, reusing the zerofier's reversed inverse
+        quotient_length = polynomial.degree() - self.zerofier.degree() + 1
+        if quotient_length < Polynomial.fast_division_threshold or root_of_unity(self.primitive_root.field, 2) is None:
+            return polynomial % self.zerofier
+        if self.zerofier_inverse is None or len(self.zerofier_inverse) < quotient_length:
+            self.zerofier_inverse = reversed_inverse(
+                self.zerofier, quotient_length)
+        return fast_divide(polynomial, self.zerofier, self.zerofier_inverse)[1]
+
+    def interpolate(self, values):
+        assert(len(self.domain) == len(
+            values)), "cannot interpolate over domain of different length than values list"
+
+        if len(self.domain) == 0:
+            return Polynomial([])
+
+        if len(self.domain) == 1:
+            return Polynomial([values[0]])
+
+        if self.left_offset_inverse is None:
+            self.left_offset_inverse = batch_inverse(
+                self.left.evaluate(self.right.zerofier))
+            self.right_offset_inverse = batch_inverse(
+                self.right.evaluate(self.left.zerofier))
+
+        half = len(self.domain) // 2
+        left_targets = [n * d for (n, d) in zip(
+            values[:half], self.left_offset_inverse)]
+        right_targets = [n * d for (n, d) in zip(
+            values[half:], self.right_offset_inverse)]
+
+        left_interpolant = self.left.interpolate(left_targets)
+        right_interpolant = self.right.interpolate(right_targets)
+
+        return left_interpolant * self.right.zerofier + right_interpolant * self.left.zerofier
 
-    left = fast_evaluate(polynomial % left_zerofier,
-                         domain[:half], primitive_root, root_order)
-    right = fast_evaluate(polynomial % right_zerofier,
-                          domain[half:], primitive_root, root_order)
 
-    return left + right
+def fast_evaluate(polynomial, domain, primitive_root, root_order):
+    return SubproductTree(domain, primitive_root, root_order).evaluate(polynomial)
 
 
 def fast_interpolate(domain, values, primitive_root, root_order):
-    assert(primitive_root ^ root_order == primitive_root.field.one()
-           ), "supplied root does not have supplied order"
-    assert(primitive_root ^ (root_order//2) != primitive_root.field.one()
-           ), "supplied root is not primitive root of supplied order"
     assert(len(domain) == len(
         values)), "cannot interpolate over domain of different length than values list"
+    return SubproductTree(domain, primitive_root, root_order).interpolate(values)
+
+
+def fast_coset_evaluate(polynomial, offset, generator, order, bit_reversed=False):
+    # with bit_reversed, the value at offset * generator^i is at position
+    # bit_reverse_index(i, order)
+    xfield = extension_field_of(
+        [offset, generator] + polynomial.coefficients)
+    if xfield is not None and base_root(offset) is not None and base_root(generator) is not None:
+        components = decompose(polynomial.coefficients, xfield.base_field)
+        return recompose(map_components(lambda c: fast_coset_evaluate(Polynomial(c), base_root(offset), base_root(generator), order, bit_reversed), components), xfield)
+
+    coefficients = polynomial.coefficients[:polynomial.degree()+1]
+    length = 1
+    while length < len(coefficients):
+        length *= 2
+    if length < order:
+        return pruned_coset_evaluate(coefficients, offset, generator, order, length, bit_reversed)
+
+    if offset.__class__ is BaseFieldElement and numpy_backend(generator, coefficients):
+        field = offset.field
+        scaled = FieldVector.from_elements(coefficients, field) * \
+            FieldVector(powers(offset.value, len(coefficients)), field)
+        padded = FieldVector.zeros(order, field)
+        padded.values[:len(coefficients)] = scaled.values
+        if bit_reversed:
+            return FieldVector(dif_ntt_array(generator.value, padded.values), field).to_elements()
+        return ntt(generator, padded).to_elements()
+
+    scaled_polynomial = Polynomial(coefficients).scale(offset)
+    padded = scaled_polynomial.coefficients + \
+        [offset.field.zero()] * (order - len(scaled_polynomial.coefficients))
+    if bit_reversed:
+        return dif_ntt_in_place(generator, padded)
+    return ntt(generator, padded)
+
+
+def pruned_coset_evaluate(coefficients, offset, generator, order, length, bit_reversed=False):
+    # at most length of the order coefficients are nonzero: rather than
+    # transforming the zero padding, evaluate on the order // length cosets
+    # offset * generator^k * <generator^(order // length)> with NTTs of size
+    # length, and interleave the results
+    count = order // length
+    padded = coefficients + [offset.field.zero()] * \
+        (length - len(coefficients))
+    sub_generator = generator ^ count
+    assert(generator ^ order == generator.field.one()
+           ), "supplied root does not have supplied order"
 
-    if len(domain) == 0:
-        return Polynomial([])
-
-    if len(domain) == 1:
-        return Polynomial([values[0]])
-
-    half = len(domain) // 2
-
-    left_zerofier = fast_zerofier(domain[:half], primitive_root, root_order)
-    right_zerofier = fast_zerofier(domain[half:], primitive_root, root_order)
-
-    left_offset = fast_evaluate(
-        right_zerofier, domain[:half], primitive_root, root_order)
-    right_offset = fast_evaluate(
-        left_zerofier, domain[half:], primitive_root, root_order)
-
-    if not all(not v.is_zero() for v in left_offset):
-        print("left_offset:", " ".join(str(v) for v in left_offset))
-
-    left_targets = [n / d for (n, d) in zip(values[:half], left_offset)]
-    right_targets = [n / d for (n, d) in zip(values[half:], right_offset)]
-
-    left_interpolant = fast_interpolate(
-        domain[:half], left_targets, primitive_root, root_order)
-    right_interpolant = fast_interpolate(
-        domain[half:], right_targets, primitive_root, root_order)
-
-    return left_interpolant * right_zerofier + right_interpolant * left_zerofier
+    if offset.__class__ is BaseFieldElement and numpy_backend(generator, padded):
+        values = coset_ntt_array(offset.value, generator.value,
+                                 FieldVector.from_elements(padded).values, order, bit_reversed)
+        return FieldVector(values, offset.field).to_elements()
+
+    values = [None] * order
+    shift = offset
+    for k in range(count):
+        scaled = Polynomial(padded).scale(shift).coefficients
+        values[k::count] = ntt(
+            sub_generator, scaled + [offset.field.zero()] * (length - len(scaled)))
+        shift = shift * generator
+    if bit_reversed:
+        return bit_reverse(values)
+    return values
 
 
-def fast_coset_evaluate(polynomial, offset, generator, order):
-    scaled_polynomial = polynomial.scale(offset)
-    values = ntt(generator, scaled_polynomial.coefficients +
-                 [offset.field.zero()] * (order - len(polynomial.coefficients)))
-    return values
+def batch_lde(columns, randomizers, omicron, offset, omega, order, bit_reversed=False):
+    # low-degree extension of a table's columns in one pass: interpolate each
+    # trace column over <omicron>, add its randomizer polynomial (given by
+    # coefficients) times the zerofier X^height - 1, and evaluate on
+    # offset * <omega>; returns the codewords, one per column, and the same
+    # values as one tuple per domain point, ready to hash as Merkle leafs
+    # (both in bit-reversed order if bit_reversed is set)
+    height = len(columns[0])
+    num_randomizers = len(randomizers[0])
+    xfield = None
+    for column in columns:
+        xfield = xfield or extension_field_of(column)
+    if ntt_backend == 'numpy' and FieldVector is not None and height >= 1 \
+            and all(e.__class__ is BaseFieldElement and e.field.p == P for e in (omicron, offset, omega)):
+        field = offset.field
+        if xfield is None:
+            trace = np.array([[e.value for e in column]
+                             for column in columns], dtype=np.uint64)
+            randomness = np.array([[r.value for r in rs]
+                                  for rs in randomizers], dtype=np.uint64).reshape(len(columns), num_randomizers)
+            values = lde_array(trace, randomness, omicron.value,
+                               offset.value, omega.value, order, bit_reversed)
+            codewords = [FieldVector(v, field) for v in values]
+            rows = [tuple(BaseFieldElement(v, field) for v in row)
+                    for row in values.T.tolist()]
+            return codewords, rows
+
+        base_field = xfield.base_field
+        trace = np.array([[[e.value for e in component] for component in decompose(column, base_field)]
+                          for column in columns], dtype=np.uint64)
+        randomness = np.array([[[e.value for e in component] for component in decompose(rs, base_field)]
+                               for rs in randomizers], dtype=np.uint64).reshape(len(columns), 3, num_randomizers)
+        values = lde_array(trace, randomness, omicron.value,
+                           offset.value, omega.value, order, bit_reversed)
+        codewords = [ExtensionFieldVector(
+            [v[0], v[1], v[2]], xfield) for v in values]
+        components = [values[:, k, :].T.tolist() for k in range(3)]
+        rows = [tuple(CubicExtensionFieldElement((a, b, c), xfield) for a, b, c in zip(*row))
+                for row in zip(*components)]
+        return codewords, rows
+
+    codewords = [fast_coset_evaluate(randomized_interpolant(column, rs, omicron),
+                                     offset, omega, order, bit_reversed)
+                 for column, rs in zip(columns, randomizers)]
+    return codewords, list(zip(*codewords))
+
+
+def randomized_interpolant(column, randomizers, omicron):
+    # interpolant of column over <omicron> plus r(X) * (X^height - 1), where r
+    # has the randomizers as coefficients; this leaves the trace values intact
+    height = len(column)
+    coefficients = intt(omicron, column) + \
+        [omicron.field.zero()] * len(randomizers)
+    for i in range(len(randomizers)):
+        coefficients[i] = coefficients[i] - randomizers[i]
+        coefficients[height + i] = coefficients[height + i] + randomizers[i]
+    return Polynomial(coefficients)
+
+
+def lde_worker(task):
+    # one base field column, sent and returned as integers (or a uint64 array)
+    # rather than pickled field elements
+    trace, randomizers, omicron, offset, omega, order, bit_reversed = task
+    field = BaseField.main()
+    if ntt_backend == 'numpy' and FieldVector is not None:
+        return lde_array(np.array([trace], dtype=np.uint64), np.array([randomizers], dtype=np.uint64).reshape(1, len(randomizers)),
+                         omicron, offset, omega, order, bit_reversed)[0]
+    codewords, rows = batch_lde([[field(t) for t in trace]], [[field(r) for r in randomizers]],
+                                field(omicron), field(offset), field(omega), order, bit_reversed)
+    return [e.value for e in codewords[0]]
+
+
+def parallel_lde(jobs, workers):
+    # run batch_lde(*job) for every job, farming single base field columns
+    # (extension columns count as three) out to a process pool
+    tasks = []
+    fields = []
+    for columns, randomizers, omicron, offset, omega, order, bit_reversed in jobs:
+        xfield = None
+        for column in columns:
+            xfield = xfield or extension_field_of(column)
+        fields += [(offset.field, xfield)]
+        for column, rs in zip(columns, randomizers):
+            if xfield is None:
+                components, randomizer_components = [column], [rs]
+            else:
+                components = decompose(column, xfield.base_field)
+                randomizer_components = decompose(rs, xfield.base_field)
+            for component, randomizer_component in zip(components, randomizer_components):
+                tasks += [([e.value for e in component], [r.value for r in randomizer_component],
+                           omicron.value, offset.value, omega.value, order, bit_reversed)]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = iter(executor.map(lde_worker, tasks))
+
+    def collect():
+        if FieldVector is not None:
+            return np.asarray(next(results), dtype=np.uint64)
+        return next(results)
+
+    outputs = []
+    for (columns, randomizers, omicron, offset, omega, order, bit_reversed), (field, xfield) in zip(jobs, fields):
+        if xfield is None:
+            values = [collect() for column in columns]
+            if FieldVector is not None:
+                codewords = [FieldVector(v, field) for v in values]
+                table = np.stack(values).T.tolist()
+            else:
+                codewords = [[BaseFieldElement(v, field)
+                              for v in codeword] for codeword in values]
+                table = zip(*values)
+            rows = [tuple(BaseFieldElement(v, field) for v in row)
+                    for row in table]
+        else:
+            values = [[collect() for k in range(3)] for column in columns]
+            if FieldVector is not None:
+                codewords = [ExtensionFieldVector(v, xfield) for v in values]
+                components = [np.stack([v[k] for v in values]).T.tolist()
+                              for k in range(3)]
+            else:
+                codewords = [[CubicExtensionFieldElement((a, b, c), xfield) for a, b, c in zip(*v)]
+                             for v in values]
+                components = [zip(*[v[k] for v in values]) for k in range(3)]
+            rows = [tuple(CubicExtensionFieldElement((a, b, c), xfield) for a, b, c in zip(*row))
+                    for row in zip(*components)]
+        outputs += [(codewords, rows)]
+    return outputs
 
 
 def fast_coset_interpolate(offset, generator, values):
+    xfield = extension_field_of([offset, generator] + list(values))
+    if xfield is not None and base_root(offset) is not None and base_root(generator) is not None:
+        components = decompose(values, xfield.base_field)
+        polynomials = map_components(lambda c: fast_coset_interpolate(
+            base_root(offset), base_root(generator), c), components)
+        # pad to equal length before recombining coefficient-wise
+        length = max(len(p.coefficients) for p in polynomials)
+        zero = xfield.base_field.zero()
+        return Polynomial(recompose([p.coefficients + [zero] * (length - len(p.coefficients)) for p in polynomials], xfield))
+
+    if offset.__class__ is BaseFieldElement and numpy_backend(generator, values):
+        coefficients = intt(generator, FieldVector.from_elements(values))
+        scaled = coefficients * \
+            FieldVector(powers(offset.inverse().value, len(values)), offset.field)
+        return Polynomial(scaled.to_elements())
+
     coefficients = intt(generator, values)
     poly = Polynomial(coefficients)
     return poly.scale(offset.inverse())
@@ -1,6 +1,11 @@
 
 from ntt import batch_inverse
 
+try:
+    from field_vector import FieldVector, vectorize
+except ImportError:  # NumPy is optional; fall back to lists of elements
+    FieldVector = None
+
 
 class PermutationArgument:
     def __init__(self, all_tables, lhs, rhs):
@@ -10,12 +15,16 @@ class PermutationArgument:
 
     def quotient(self, fri_domain):
         field = fri_domain.omega.field
-        difference_codeword = [l - r for l, r in zip(self.all_tables[self.lhs[0]].codewords[self.lhs[1]],
-                                                     self.all_tables[self.rhs[0]].codewords[self.rhs[1]])]
-        zerofier = [fri_domain(i) - field.one()
-                    for i in range(fri_domain.length)]
+        lhs_codeword = self.all_tables[self.lhs[0]].codewords[self.lhs[1]]
+        rhs_codeword = self.all_tables[self.rhs[0]].codewords[self.rhs[1]]
+        if FieldVector is not None:
+            zerofier = FieldVector.from_elements(
+                fri_domain.list()) - field.one()
+            return (vectorize(lhs_codeword) - vectorize(rhs_codeword)) * zerofier.inverse()
+        difference_codeword = [l - r for l, r in zip(lhs_codeword, rhs_codeword)]
+        zerofier = [x - field.one() for x in fri_domain.list()]
         zerofier_inverse = batch_inverse(zerofier)
-        quotient_codeword = [d * d.field.lift(z)
+        quotient_codeword = [d * z
                              for d, z in zip(difference_codeword, zerofier_inverse)]
         return quotient_codeword
 
@@ -378,7 +378,7 @@ class ProcessorTable(Table):
             row = self.matrix[i]
 
             # first, copy over existing row
-            new_row = [xfield.lift(nr) for nr in row]
+            new_row = [nr for nr in row]
 
             # next, define the additional columns
 
@@ -404,8 +404,7 @@ class ProcessorTable(Table):
             new_row += [input_evaluation_running_evaluation]
             if row[ProcessorTable.current_instruction] == BaseFieldElement(ord(','), field):
                 input_evaluation_running_evaluation = input_evaluation_running_evaluation * gamma \
-                    + xfield.lift(self.matrix[i+1]
-                                  [ProcessorTable.memory_value])
+                    + self.matrix[i+1][ProcessorTable.memory_value]
                 # the memory-value register only assumes the input value after the instruction has been performed
 
             # 4. evaluation for output
@@ -418,8 +417,6 @@ class ProcessorTable(Table):
 
         self.field = xfield
         self.matrix = extended_matrix
-        self.codewords = [[xfield.lift(c) for c in cdwd]
-                          for cdwd in self.codewords]
 
         self.instruction_permutation_terminal = instruction_permutation_running_product
         self.memory_permutation_terminal = memory_permutation_running_product
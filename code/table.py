@@ -4,8 +4,23 @@ from multivariate import *
 from ntt import *
 import os
 
+try:
+    from field_vector import FieldVector, vectorize
+except ImportError:  # NumPy is optional; fall back to lists of elements
+    FieldVector = None
+
 
 class Table:
+    # "ntt" interpolates over the omicron subgroup with one INTT and adds a
+    # random multiple of its zerofier; "interpolate" interpolates the trace
+    # and randomizer points with fast_interpolate
+    lde_mode = os.environ.get('LDE_MODE', 'ntt')
+    # subproduct trees for the interpolation domains, shared by all columns
+    # and by tables of equal height
+    subproduct_trees = {}
+    # processes for the low-degree extension of all tables' columns
+    lde_workers = int(os.environ.get('LDE_WORKERS', '1'))
+
     def __init__(self, field, base_width, full_width, length, num_randomizers, generator, order):
         self.field = field
         self.base_width = base_width
@@ -117,11 +132,16 @@ class Table:
             return [Polynomial([])] * len(column_indices)
 
         polynomials = []
-        omicron_domain = [self.field.lift(self.omicron ^ i)
-                          for i in range(self.height)]
-        randomizer_domain = [self.field.lift(omega^(2*i+1)) # odd powers of omega => no collision with omicron
-                             for i in range(self.num_randomizers)]
-        domain = omicron_domain + randomizer_domain
+        key = (self.height, self.num_randomizers, omega, omega_order)
+        if key not in Table.subproduct_trees:
+            omicron_domain = [self.field.lift(o)
+                              for o in power_table(self.omicron, self.height)]
+            randomizer_domain = [self.field.lift(omega^(2*i+1)) # odd powers of omega => no collision with omicron
+                                 for i in range(self.num_randomizers)]
+            Table.subproduct_trees[key] = SubproductTree(
+                omicron_domain + randomizer_domain, self.field.lift(omega), omega_order)
+        tree = Table.subproduct_trees[key]
+        domain = tree.domain
         for c in column_indices:
             trace = [row[c] for row in self.matrix]
             randomizers = [self.field.sample(os.urandom(3*8))
@@ -129,25 +149,80 @@ class Table:
             values = trace + randomizers
             assert(len(values) == len(
                 domain)), f"length of domain {len(domain)} and values {len(values)} are unequal"
-            polynomials += [fast_interpolate(domain,
-                                             values,
-                                             self.field.lift(omega), omega_order)]
+            polynomials += [tree.interpolate(values)]
 
         return polynomials
 
-    def lde(self, domain):
+    def lde_job(self, domain, column_indices):
+        # arguments for batch_lde on the given columns
+        columns = [[row[c] for row in self.matrix] for c in column_indices]
+        randomizers = [[self.field.sample(os.urandom(3*8)) for i in range(self.num_randomizers)]
+                       for c in column_indices]
+        return (columns, randomizers, self.omicron, domain.offset, domain.omega, domain.length, domain.bit_reversed)
+
+    def lde_columns(self, domain, column_indices, field):
+        # codewords of the given columns and the same values row-major, with
+        # one tuple per domain point, ready to hash as Merkle leafs
+        if self.height == 0:
+            codewords = [[field.zero()] * domain.length for c in column_indices]
+            return codewords, [tuple(field.zero() for c in column_indices)] * domain.length
+
+        if Table.lde_mode == 'ntt':
+            return batch_lde(*self.lde_job(domain, column_indices))
+
         polynomials = self.interpolate_columns(
-            domain.omega, domain.length, column_indices=range(self.base_width))
-        self.codewords = [domain.evaluate(p) for p in polynomials]
+            domain.omega, domain.length, column_indices=column_indices)
+        if field == self.field:
+            codewords = [domain.evaluate(p) for p in polynomials]
+        else:
+            codewords = [domain.xevaluate(p, field) for p in polynomials]
+        return codewords, list(zip(*codewords))
+
+    def lde(self, domain):
+        self.codewords, self.base_rows = self.lde_columns(
+            domain, range(self.base_width), self.field)
         return self.codewords
 
     def ldex(self, domain, xfield):
-        polynomials = self.interpolate_columns(
-            domain.omega, domain.length, column_indices=range(self.base_width, self.full_width))
-        codewords = [domain.xevaluate(p, xfield) for p in polynomials]
+        codewords, self.extension_rows = self.lde_columns(
+            domain, range(self.base_width, self.full_width), xfield)
         self.codewords += codewords
         return codewords
 
+    @staticmethod
+    def lde_tables(tables, domain, xfield=None):
+        # lde (or ldex, if xfield is given) of all tables; returns the
+        # concatenated codewords. With Table.lde_workers > 1 the columns of
+        # all tables are transformed in a process pool
+        if Table.lde_workers <= 1 or Table.lde_mode != 'ntt':
+            if xfield is None:
+                return [c for table in tables for c in table.lde(domain)]
+            return [c for table in tables for c in table.ldex(domain, xfield)]
+
+        if xfield is None:
+            column_indices = [range(table.base_width) for table in tables]
+        else:
+            column_indices = [range(table.base_width, table.full_width)
+                              for table in tables]
+        busy = [table for table in tables if table.height != 0]
+        results = dict(zip(busy, parallel_lde([table.lde_job(domain, indices)
+                                               for table, indices in zip(tables, column_indices) if table.height != 0], Table.lde_workers)))
+
+        all_codewords = []
+        for table, indices in zip(tables, column_indices):
+            if table in results:
+                codewords, rows = results[table]
+            else:
+                codewords, rows = table.lde_columns(
+                    domain, indices, xfield or table.field)
+            if xfield is None:
+                table.codewords, table.base_rows = codewords, rows
+            else:
+                table.codewords += codewords
+                table.extension_rows = rows
+            all_codewords += codewords
+        return all_codewords
+
     @abstractmethod
     def boundary_constraints_ext(self):
         pass
@@ -158,19 +233,29 @@ class Table:
 
         quotient_codewords = []
         boundary_constraints = self.boundary_constraints_ext(challenges)
-        zerofier = [fri_domain(i) - fri_domain.omega.field.one()
-                    for i in range(fri_domain.length)]
-        zerofier_inverse = batch_inverse(zerofier)
 
-        for l in range(len(boundary_constraints)):
-            mpo = boundary_constraints[l]
-            quotient_codewords += [[mpo.evaluate([codewords[j][i] for j in range(
-                self.full_width)]) * self.field.lift(zerofier_inverse[i]) for i in range(fri_domain.length)]]
+        if FieldVector is not None:
+            columns = [vectorize(c) for c in codewords]
+            zerofier = FieldVector.from_elements(
+                fri_domain.list()) - fri_domain.omega.field.one()
+            zerofier_inverse = zerofier.inverse()
+            for mpo in boundary_constraints:
+                quotient_codewords += [mpo.evaluate(
+                    columns[:self.full_width]) * zerofier_inverse]
+        else:
+            zerofier = [x - fri_domain.omega.field.one()
+                        for x in fri_domain.list()]
+            zerofier_inverse = batch_inverse(zerofier)
+
+            for l in range(len(boundary_constraints)):
+                mpo = boundary_constraints[l]
+                quotient_codewords += [[mpo.evaluate([codewords[j][i] for j in range(
+                    self.full_width)]) * zerofier_inverse[i] for i in range(fri_domain.length)]]
 
         if os.environ.get('DEBUG') is not None:
             print(f"before domain interpolation of bq in {type(self)}")
             for qc in quotient_codewords:
-                interpolated = fri_domain.xinterpolate(qc)
+                interpolated = fri_domain.xinterpolate(list(qc))
                 print(f"degree of interpolation: {interpolated.degree()}")
                 assert(interpolated.degree() < fri_domain.length - 1)
             print("Done!")
@@ -191,34 +276,55 @@ class Table:
 
         quotients = []
         field = domain.omega.field
-        subgroup_zerofier = [(domain(i) ^ self.height) - field.one()
-                             for i in range(domain.length)]
-        if self.height != 0:
-            subgroup_zerofier_inverse = batch_inverse(subgroup_zerofier)
+
+        if FieldVector is not None:
+            points = FieldVector.from_elements(domain.list())
+            subgroup_zerofier = (points ^ self.height) - field.one()
+            if self.height != 0:
+                subgroup_zerofier_inverse = subgroup_zerofier.inverse()
+            else:
+                subgroup_zerofier_inverse = subgroup_zerofier
+            zerofier_inverse = subgroup_zerofier_inverse * \
+                (points - self.omicron.inverse())
+            columns = [vectorize(c) for c in codewords[:self.full_width]]
+            next_columns = [domain.rotate(c, self.unit_distance(domain.length))
+                            for c in columns]
         else:
-            subgroup_zerofier_inverse = subgroup_zerofier
-        zerofier_inverse = [subgroup_zerofier_inverse[i] *
-                            (domain(i) - self.omicron.inverse()) for i in range(domain.length)]
+            points = domain.list()
+            subgroup_zerofier = [xh - field.one()
+                                 for xh in domain.powers(self.height)]
+            if self.height != 0:
+                subgroup_zerofier_inverse = batch_inverse(subgroup_zerofier)
+            else:
+                subgroup_zerofier_inverse = subgroup_zerofier
+            zerofier_inverse = [subgroup_zerofier_inverse[i] *
+                                (points[i] - self.omicron.inverse()) for i in range(domain.length)]
+            next_positions = domain.rotate(
+                list(range(domain.length)), self.unit_distance(domain.length))
 
         transition_constraints = self.transition_constraints_ext(challenges)
 
         for l in range(len(transition_constraints)):
             mpo = transition_constraints[l]
-            quotient_codeword = []
-            composition_codeword = []
-            for i in range(domain.length):
-                point = [codewords[j][i] for j in range(self.full_width)] + \
-                    [codewords[j][(i+self.unit_distance(domain.length)) %
-                                  domain.length] for j in range(self.full_width)]
-                composition_codeword += [mpo.evaluate(point)]
-                quotient_codeword += [mpo.evaluate(point)
-                                      * self.field.lift(zerofier_inverse[i])]
+            if FieldVector is not None:
+                composition_codeword = mpo.evaluate(columns + next_columns)
+                quotient_codeword = composition_codeword * zerofier_inverse
+                point = [c[domain.length-1] for c in columns + next_columns]
+            else:
+                quotient_codeword = []
+                composition_codeword = []
+                for i in range(domain.length):
+                    point = [codewords[j][i] for j in range(self.full_width)] + \
+                        [codewords[j][next_positions[i]] for j in range(self.full_width)]
+                    composition_codeword += [mpo.evaluate(point)]
+                    quotient_codeword += [mpo.evaluate(point)
+                                          * zerofier_inverse[i]]
 
             quotients += [quotient_codeword]
 
             if os.environ.get('DEBUG') is not None:
                 print(f"before domain interpolation of tq in {type(self)}")
-                interpolated = domain.xinterpolate(quotients[-1])
+                interpolated = domain.xinterpolate(list(quotients[-1]))
                 print(f"degree of interpolation: {interpolated.degree()}")
                 if interpolated.degree() >= domain.length - 1:
                     print("terminal index:", self.terminal_index)
@@ -230,7 +336,7 @@ class Table:
                           for c in quotient_codeword[:5]))
                     assert(False)
                 assert(domain.xinterpolate(
-                    quotients[-1]).degree() < domain.length-1), f"quotient polynomial has maximal degree in table {type(self)}"
+                    list(quotients[-1])).degree() < domain.length-1), f"quotient polynomial has maximal degree in table {type(self)}"
                 print("Done!")
 
         return quotients
@@ -253,18 +359,26 @@ class Table:
     def terminal_quotients(self, domain, codewords, challenges, terminals):
         quotient_codewords = []
 
-        zerofier_codeword = [domain(i) - self.omicron.inverse()
-                             for i in range(domain.length)]
+        if FieldVector is not None:
+            columns = [vectorize(c) for c in codewords[:self.full_width]]
+            zerofier_codeword = FieldVector.from_elements(
+                domain.list()) - self.omicron.inverse()
+            zerofier_inverse = zerofier_codeword.inverse()
+            for mpo in self.terminal_constraints_ext(challenges, terminals):
+                quotient_codewords += [mpo.evaluate(columns) * zerofier_inverse]
+        else:
+            zerofier_codeword = [x - self.omicron.inverse()
+                                 for x in domain.list()]
 
-        zerofier_inverse = batch_inverse(zerofier_codeword)
-        for mpo in self.terminal_constraints_ext(challenges, terminals):
-            quotient_codewords += [[mpo.evaluate([codewords[j][i] for j in range(
-                self.full_width)]) * self.field.lift(zerofier_inverse[i]) for i in range(domain.length)]]
+            zerofier_inverse = batch_inverse(zerofier_codeword)
+            for mpo in self.terminal_constraints_ext(challenges, terminals):
+                quotient_codewords += [[mpo.evaluate([codewords[j][i] for j in range(
+                    self.full_width)]) * zerofier_inverse[i] for i in range(domain.length)]]
 
         if os.environ.get('DEBUG') is not None:
             for i in range(len(quotient_codewords)):
                 qc = quotient_codewords[i]
-                interpolated = domain.xinterpolate(qc)
+                interpolated = domain.xinterpolate(list(qc))
                 if interpolated.degree() >= domain.length - 1:
                     print("interpolated degree:", interpolated.degree())
                     print("domain length:", domain.length)
@@ -292,6 +406,9 @@ class Table:
         return degree_bounds
 
     def all_quotients(self, domain, codewords, challenges, terminals):
+        if FieldVector is not None:
+            # convert once; quotients come out as (extension) field vectors
+            codewords = [vectorize(c) for c in codewords]
         boundary_quotients = self.boundary_quotients(
             domain, codewords, challenges)
         transition_quotients = self.transition_quotients(
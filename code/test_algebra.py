@@ -0,0 +1,38 @@
+import os
+import pickle
+from algebra import *
+
+
+def test_goldilocks():
+    field = BaseField.main()
+    generic = BaseField(field.p)
+    assert(type(field) == GoldilocksField), "main field is not specialized"
+
+    edge_cases = [0, 1, 2, field.p - 2, field.p - 1, 1 << 32, (1 << 64) - (1 << 32)]
+    values = edge_cases + [field.sample(os.urandom(17)).value for i in range(50)]
+    for a in values:
+        for b in edge_cases + values[-5:]:
+            lhs, rhs = field(a), field(b)
+            generic_lhs, generic_rhs = generic(a), generic(b)
+            assert((lhs + rhs).value == (generic_lhs + generic_rhs).value), "addition fail"
+            assert((lhs - rhs).value == (generic_lhs - generic_rhs).value), "subtraction fail"
+            assert((lhs * rhs).value == (generic_lhs * generic_rhs).value), "multiplication fail"
+            assert((-lhs).value == (-generic_lhs).value), "negation fail"
+            if b != 0:
+                assert((lhs / rhs).value == (generic_lhs / generic_rhs).value), "division fail"
+        if a != 0:
+            assert((field(a).inverse() * field(a)) == field.one()), "inverse fail"
+        assert((field(a) ^ 1234567).value == (generic(a) ^ 1234567).value), "power fail"
+
+    assert(field(field.p + 5) == field(5)), "constructor does not reduce"
+    assert(field(-1) == -field.one()), "constructor does not reduce negative integers"
+
+
+def test_interned_constants():
+    field = BaseField.main()
+    assert(field.zero() is field.zero()), "zero is not interned"
+    assert(field.one() is field(1)), "one is not interned"
+    assert(field(ord('+')) is field(ord('+'))), "small integers are not interned"
+    assert(not hasattr(field.one(), '__dict__')), "field elements carry a __dict__"
+    element = field.sample(os.urandom(17))
+    assert(pickle.loads(pickle.dumps(element)) == element), "pickle round trip fail"
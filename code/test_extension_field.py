@@ -19,3 +19,45 @@ def test_xgcd():
 
     assert((a*x) % y == Polynomial([field.one()])
            ), f"inverse fail: a = {a} and x = {x} but a * x mod y = {a*x % y} =/= 1"
+
+
+def test_cubic():
+    field = BaseField.main()
+    one = field.one()
+    generic = ExtensionField(Polynomial([one, -one, field.zero(), one]))
+    cubic = ExtensionField.main()
+    assert(type(cubic) == CubicExtensionField), "main extension field is not specialized"
+
+    for trial in range(20):
+        randomness = [os.urandom(8*3) for i in range(2)]
+        a, b = [cubic.sample(r) for r in randomness]
+        c, d = [generic.sample(r) for r in randomness]
+        assert(a.polynomial == c.polynomial), "sampling mismatch"
+        assert((a * b).polynomial == (c * d).polynomial), "multiplication mismatch"
+        assert((a + b).polynomial == (c + d).polynomial), "addition mismatch"
+        assert((a - b).polynomial == (c - d).polynomial), "subtraction mismatch"
+        assert((-a).polynomial == (-c).polynomial), "negation mismatch"
+        assert(cubic.square(a) == a * a), "squaring mismatch"
+        assert((a ^ 17).polynomial == (c ^ 17).polynomial), "power mismatch"
+        assert(a.inverse().polynomial == c.inverse().polynomial), "inverse mismatch"
+        assert(cubic.frobenius(a) == a ^ field.p), "frobenius mismatch"
+
+
+def test_batch_inverse():
+    field = ExtensionField.main()
+    array = [field.sample(os.urandom(8*3)) for i in range(20)]
+    inverses = field.batch_inverse(array)
+    assert(all((i*a) == field.one() for i, a in zip(inverses, array))
+           ), "extension field batch inverse fail"
+
+
+def test_mixed_arithmetic():
+    base_field = BaseField.main()
+    field = ExtensionField.main()
+    a = field.sample(os.urandom(8*3))
+    b = base_field.sample(os.urandom(8))
+    lifted = field.lift(b)
+    assert(a * b == a * lifted and b * a == lifted * a), "mixed multiplication fail"
+    assert(a + b == a + lifted and b + a == lifted + a), "mixed addition fail"
+    assert(a - b == a - lifted and b - a == lifted - a), "mixed subtraction fail"
+    assert(a / b == a / lifted and b / a == lifted / a), "mixed division fail"
@@ -0,0 +1,119 @@
+import os
+import pytest
+from algebra import *
+
+np = pytest.importorskip("numpy")
+import field_vector
+from field_vector import FieldVector, ExtensionFieldVector, ntt_array, four_step_ntt_array
+from extension_field import ExtensionField
+
+
+def test_arithmetic():
+    field = BaseField.main()
+    n = 64
+    lhs = [field.sample(os.urandom(17)) for i in range(n)]
+    rhs = [field.sample(os.urandom(17)) for i in range(n)]
+    # exercise the carry and borrow corrections
+    lhs += [field(field.p - 1), field(field.p - 1), field.zero(), field(1 << 63)]
+    rhs += [field(field.p - 1), field.one(), field(field.p - 1), field(1 << 63)]
+
+    lhs_vector = FieldVector.from_elements(lhs)
+    rhs_vector = FieldVector.from_elements(rhs)
+
+    assert((lhs_vector + rhs_vector).to_elements() ==
+           [l + r for l, r in zip(lhs, rhs)]), "vector addition fail"
+    assert((lhs_vector - rhs_vector).to_elements() ==
+           [l - r for l, r in zip(lhs, rhs)]), "vector subtraction fail"
+    assert((lhs_vector * rhs_vector).to_elements() ==
+           [l * r for l, r in zip(lhs, rhs)]), "vector multiplication fail"
+    assert((-lhs_vector).to_elements() ==
+           [-l for l in lhs]), "vector negation fail"
+
+
+def test_scalar_and_power():
+    field = BaseField.main()
+    elements = [field.sample(os.urandom(17)) for i in range(32)]
+    scalar = field.sample(os.urandom(17))
+    vector = FieldVector.from_elements(elements)
+
+    assert((vector * scalar).to_elements() ==
+           [e * scalar for e in elements]), "scalar multiplication fail"
+    assert((vector + scalar).to_elements() ==
+           [e + scalar for e in elements]), "scalar addition fail"
+    assert((vector - scalar).to_elements() ==
+           [e - scalar for e in elements]), "scalar subtraction fail"
+    assert((scalar - vector).to_elements() ==
+           [scalar - e for e in elements]), "reflected scalar subtraction fail"
+    assert((vector ^ 13).to_elements() ==
+           [e ^ 13 for e in elements]), "elementwise power fail"
+
+
+def test_batch_inverse():
+    field = BaseField.main()
+    elements = [field.sample(os.urandom(17)) for i in range(32)]
+    vector = FieldVector.from_elements(elements)
+    product = vector * vector.inverse()
+    assert(all(p == field.one() for p in product)), "batch inverse fail"
+
+
+def test_extension_vector():
+    field = BaseField.main()
+    xfield = ExtensionField.main()
+    n = 32
+    lhs = [xfield.sample(os.urandom(24)) for i in range(n)]
+    rhs = [xfield.sample(os.urandom(24)) for i in range(n)]
+    base = [field.sample(os.urandom(17)) for i in range(n)]
+    scalar = xfield.sample(os.urandom(24))
+
+    lhs_vector = ExtensionFieldVector.from_elements(lhs)
+    rhs_vector = ExtensionFieldVector.from_elements(rhs)
+    base_vector = FieldVector.from_elements(base)
+
+    assert((lhs_vector + rhs_vector).to_elements() ==
+           [l + r for l, r in zip(lhs, rhs)]), "extension vector addition fail"
+    assert((lhs_vector - rhs_vector).to_elements() ==
+           [l - r for l, r in zip(lhs, rhs)]), "extension vector subtraction fail"
+    assert((lhs_vector * rhs_vector).to_elements() ==
+           [l * r for l, r in zip(lhs, rhs)]), "extension vector multiplication fail"
+    assert((lhs_vector * base_vector).to_elements() ==
+           [l * b for l, b in zip(lhs, base)]), "mixed vector multiplication fail"
+    assert((base_vector - lhs_vector).to_elements() ==
+           [b - l for l, b in zip(lhs, base)]), "mixed vector subtraction fail"
+    assert((scalar * base_vector).to_elements() ==
+           [scalar * b for b in base]), "extension scalar multiplication fail"
+    assert((lhs_vector ^ 5).to_elements() ==
+           [l ^ 5 for l in lhs]), "extension vector power fail"
+    assert(lhs_vector.inverse().to_elements() ==
+           [l.inverse() for l in lhs]), "extension vector inverse fail"
+    assert(lhs_vector.rotate(3).to_elements() ==
+           lhs[3:] + lhs[:3]), "extension vector rotation fail"
+
+
+def test_four_step_ntt(tmp_path):
+    field = BaseField.main()
+    for logn in [1, 4, 9, 10]:
+        n = 1 << logn
+        root = field.primitive_nth_root(n).value
+        values = np.array([field.sample(os.urandom(17)).value
+                          for i in range(n)], dtype=np.uint64)
+        assert(np.array_equal(four_step_ntt_array(root, values), ntt_array(
+            root, values))), "four-step ntt does not match radix-2 ntt"
+
+    buffer = np.memmap(tmp_path / "codeword", dtype=np.uint64,
+                       mode="w+", shape=(n,))
+    four_step_ntt_array(root, values, out=buffer)
+    assert(np.array_equal(buffer, ntt_array(root, values))
+           ), "four-step ntt into memory mapped buffer fails"
+
+    # transforms dispatched to the four-step algorithm need no full-size twiddles
+    threshold = field_vector.four_step_threshold
+    field_vector.four_step_threshold = n
+    try:
+        root = field.primitive_nth_root(2 * n).value
+        doubled = np.concatenate((values, values))
+        assert(np.array_equal(ntt_array(root, doubled), four_step_ntt_array(
+            root, doubled))), "four-step dispatch of ntt fails"
+        assert((root, 2 * n) not in field_vector.twiddle_arrays
+               ), "four-step dispatch builds unused twiddles"
+    finally:
+        field_vector.four_step_threshold = threshold
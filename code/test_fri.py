@@ -1,3 +1,4 @@
+import pytest
 from algebra import *
 from fri import *
 
@@ -33,7 +34,7 @@ def test_fri():
     polynomial = Polynomial([xfield(i) for i in range(degree+1)])
 
     codeword = fri.domain.xevaluate(polynomial)
-    root = Merkle(codeword).root()
+    root = Merkle(fri.leafs(codeword)).root()
 
     # test valid codeword
     print("testing valid codeword ...")
@@ -57,3 +58,82 @@ def test_fri():
     assert not fri.verify(
         proof_stream, points), "proof should fail, but is accepted ..."
     print("success! \\o/")
+
+
+def test_fri_bit_reversed():
+    field = BaseField.main()
+    xfield = ExtensionField.main()
+    degree = 63
+    expansion_factor = 16
+    num_colinearity_tests = 17
+    initial_codeword_length = (degree + 1) * expansion_factor
+
+    omega = field.primitive_nth_root(initial_codeword_length)
+    generator = field.generator()
+    fri = Fri(generator, omega, initial_codeword_length,
+              expansion_factor, num_colinearity_tests, xfield, bit_reversed=True)
+
+    polynomial = Polynomial([xfield(i) for i in range(degree+1)])
+    codeword = fri.domain.xevaluate(polynomial)
+    assert(fri.domain.natural(codeword) == [polynomial.evaluate(xfield.lift(
+        fri.domain(i))) for i in range(fri.domain.length)]), "codeword is not in bit-reversed order"
+    assert(fri.domain.xinterpolate(codeword) ==
+           polynomial), "bit-reversed interpolation fails"
+    natural = fri.domain.natural(codeword)
+    assert(fri.domain.natural(fri.domain.rotate(codeword, 3)) ==
+           natural[3:] + natural[:3]), "bit-reversed rotation fails"
+
+    proof_stream = ProofStream()
+    fri.prove(codeword, proof_stream)
+    assert(fri.verify(proof_stream, Merkle(fri.leafs(codeword)).root())
+           ), "rejecting bit-reversed proof, but proof should be valid"
+
+    for i in range(0, degree//3):
+        codeword[i] = xfield.zero()
+    proof_stream = ProofStream()
+    fri.prove(codeword, proof_stream)
+    assert(not fri.verify(proof_stream, Merkle(fri.leafs(codeword)).root())
+           ), "bit-reversed proof should fail, but is accepted"
+
+
+def test_fri_folding_factor():
+    field = BaseField.main()
+    xfield = ExtensionField.main()
+    degree = 63
+    expansion_factor = 16
+    num_colinearity_tests = 17
+    initial_codeword_length = (degree + 1) * expansion_factor
+
+    omega = field.primitive_nth_root(initial_codeword_length)
+    generator = field.generator()
+    polynomial = Polynomial([xfield(i) for i in range(degree+1)])
+
+    for folding_factor in [4, 8, 16]:
+        for bit_reversed in [False, True]:
+            fri = Fri(generator, omega, initial_codeword_length, expansion_factor,
+                      num_colinearity_tests, xfield, bit_reversed, folding_factor)
+            codeword = fri.domain.xevaluate(polynomial)
+
+            proof_stream = ProofStream()
+            fri.prove(codeword, proof_stream)
+            assert(fri.verify(proof_stream, Merkle(fri.leafs(codeword)).root())
+                   ), f"rejecting proof folding by {folding_factor}, but proof should be valid"
+
+            for i in range(0, degree//3):
+                codeword[i] = xfield.zero()
+            proof_stream = ProofStream()
+            fri.prove(codeword, proof_stream)
+            assert(not fri.verify(proof_stream, Merkle(fri.leafs(codeword)).root())
+                   ), f"proof folding by {folding_factor} should fail, but is accepted"
+
+
+def test_fri_folding_factor_too_large():
+    field = BaseField.main()
+    xfield = ExtensionField.main()
+    initial_codeword_length = 1024
+    omega = field.primitive_nth_root(initial_codeword_length)
+
+    # a single fold of 64 points leaves no second round to fold into
+    with pytest.raises(AssertionError):
+        Fri(field.generator(), omega, initial_codeword_length,
+            16, 17, xfield, folding_factor=64)
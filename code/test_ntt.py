@@ -1,7 +1,9 @@
 from algebra import *
 from univariate import *
 from ntt import *
+from extension_field import ExtensionField
 import os
+import pytest
 
 
 def test_ntt():
@@ -142,3 +144,194 @@ def test_batch_inverse():
     array = [field.sample(os.urandom(8)) for i in range(n)]
     inverses = batch_inverse(array)
     assert(all((i*a) == field.one() for i, a in zip(inverses, array)))
+
+
+def test_numpy_backend():
+    pytest.importorskip("numpy")
+    field = BaseField.main()
+    offset = field.generator()
+
+    for logn in range(4, 11):
+        n = 1 << logn
+        primitive_root = field.primitive_nth_root(n)
+        values = [field.sample(os.urandom(17)) for i in range(n)]
+
+        assert(ntt(primitive_root, values) == ntt_in_place(
+            primitive_root, [v for v in values])), "numpy ntt does not match reference ntt"
+        assert(ntt(primitive_root, intt(primitive_root, values))
+               == values), "numpy intt is not the inverse of numpy ntt"
+
+        poly = fast_coset_interpolate(offset, primitive_root, values)
+        assert(fast_coset_evaluate(poly, offset, primitive_root, n) ==
+               values), "numpy coset interpolation and evaluation are not inverses"
+        assert(poly.evaluate(offset) ==
+               values[0]), "numpy coset interpolant has wrong value"
+
+
+def test_extension_ntt():
+    field = BaseField.main()
+    xfield = ExtensionField.main()
+    n = 64
+    primitive_root = field.primitive_nth_root(n)
+    offset = xfield.lift(field.generator())
+
+    coefficients = [xfield.sample(os.urandom(24)) for i in range(n)]
+    poly = Polynomial(coefficients)
+
+    values = ntt(xfield.lift(primitive_root), coefficients)
+    assert(values == [poly.evaluate(xfield.lift(primitive_root ^ i))
+                      for i in range(n)]), "extension ntt does not compute correct batch-evaluation"
+    assert(intt(primitive_root, values) ==
+           coefficients), "extension intt is not the inverse of extension ntt"
+
+    coset_values = fast_coset_evaluate(
+        poly, offset, xfield.lift(primitive_root), n)
+    assert(coset_values[1] == poly.evaluate(offset * xfield.lift(primitive_root))
+           ), "extension coset evaluation has wrong value"
+    assert(fast_coset_interpolate(offset, primitive_root, coset_values) ==
+           poly), "extension coset interpolation does not invert coset evaluation"
+
+
+def test_mixed_extension_ntt():
+    field = BaseField.main()
+    xfield = ExtensionField.main()
+    n = 64
+    primitive_root = field.primitive_nth_root(n)
+
+    # a base field element first must not send the list to the base field backend
+    assert(n > numpy_ntt_threshold)
+    values = [field(3)] + [xfield.sample(os.urandom(24))
+                           for i in range(n-1)]
+    lifted = [xfield.lift(v) for v in values]
+    assert(intt(primitive_root, ntt(primitive_root, values)) ==
+           lifted), "mixed base and extension ntt does not round trip"
+    assert(ntt(primitive_root, values) == ntt(xfield.lift(primitive_root), lifted)
+           ), "mixed base and extension ntt does not match lifted ntt"
+
+
+def test_subproduct_tree():
+    field = BaseField.main()
+    n = 64
+    primitive_root = field.primitive_nth_root(n)
+    domain = [field.sample(os.urandom(17)) for i in range(21)]
+    tree = SubproductTree(domain, primitive_root, n)
+
+    for trial in range(3):
+        values = [field.sample(os.urandom(17)) for i in range(len(domain))]
+        poly = tree.interpolate(values)
+        assert(poly.degree() < len(domain)), "interpolant has too large degree"
+        assert(tree.evaluate(poly) ==
+               values), "subproduct tree interpolation and evaluation are not inverses"
+        assert(poly.evaluate_domain(domain) ==
+               values), "subproduct tree interpolant has wrong values"
+
+
+def test_fast_divide():
+    field = BaseField.main()
+    xfield = ExtensionField.main()
+
+    for numerator_degree, denominator_degree in [(100, 30), (200, 1), (90, 90), (300, 150)]:
+        numerator = Polynomial([xfield.sample(os.urandom(24))
+                               for i in range(numerator_degree+1)])
+        denominator = Polynomial([field.sample(os.urandom(17))
+                                 for i in range(denominator_degree+1)])
+
+        quotient, remainder = fast_divide(numerator, denominator)
+        assert(remainder.degree() < denominator.degree()
+               ), "fast division remainder has too large degree"
+        assert(quotient * denominator + remainder ==
+               numerator), "fast division does not satisfy division identity"
+
+        inverse = reversed_inverse(denominator, numerator_degree + 1)
+        assert(fast_divide(numerator, denominator, inverse) == (quotient, remainder)
+               ), "fast division with precomputed inverse gives different result"
+
+
+def test_pruned_coset_evaluate():
+    field = BaseField.main()
+    n = 256
+    primitive_root = field.primitive_nth_root(n)
+    offset = field.generator()
+
+    for num_coefficients in [0, 1, 5, 16, 40, 64, 100, 129, 256]:
+        poly = Polynomial([field.sample(os.urandom(17))
+                           for i in range(num_coefficients)])
+        values = fast_coset_evaluate(poly, offset, primitive_root, n)
+        assert(values == [poly.evaluate(offset * (primitive_root ^ i))
+                          for i in range(n)]), f"coset evaluation of {num_coefficients} coefficients fails"
+        assert(fast_coset_evaluate(poly, offset, primitive_root, n, True) == bit_reverse(
+            values)), f"bit-reversed coset evaluation of {num_coefficients} coefficients fails"
+
+
+def test_batch_lde():
+    field = BaseField.main()
+    xfield = ExtensionField.main()
+    height, num_randomizers, order = 16, 2, 128
+    omicron = field.primitive_nth_root(height)
+    omega = field.primitive_nth_root(order)
+    offset = field.generator()
+
+    for sample in [lambda: field.sample(os.urandom(17)), lambda: xfield.sample(os.urandom(24))]:
+        columns = [[sample() for i in range(height)] for c in range(3)]
+        randomizers = [[field.sample(os.urandom(17)) for i in range(num_randomizers)]
+                       for c in range(3)]
+        codewords, rows = batch_lde(
+            columns, randomizers, omicron, offset, omega, order)
+        assert(rows == list(zip(*[list(c) for c in codewords]))
+               ), "batch lde rows do not match codewords"
+        for column, codeword in zip(columns, codewords):
+            polynomial = fast_coset_interpolate(offset, omega, list(codeword))
+            assert(polynomial.degree() < height +
+                   num_randomizers), "batch lde interpolant has too large degree"
+            assert([polynomial.evaluate(omicron ^ i) for i in range(height)]
+                   == column), "batch lde interpolant does not match trace"
+
+
+def test_parallel_lde():
+    field = BaseField.main()
+    xfield = ExtensionField.main()
+    order = 64
+    omega = field.primitive_nth_root(order)
+    offset = field.generator()
+
+    jobs = []
+    for height, sample in [(8, lambda: field.sample(os.urandom(17))), (4, lambda: xfield.sample(os.urandom(24)))]:
+        columns = [[sample() for i in range(height)] for c in range(2)]
+        randomizers = [[field.sample(os.urandom(17))] for c in range(2)]
+        jobs += [(columns, randomizers, field.primitive_nth_root(height), offset, omega, order, False)]
+
+    for (codewords, rows), job in zip(parallel_lde(jobs, 2), jobs):
+        expected_codewords, expected_rows = batch_lde(*job)
+        assert([list(c) for c in codewords] == [list(c) for c in expected_codewords]
+               ), "parallel lde codewords differ from batch lde"
+        assert(rows == expected_rows), "parallel lde rows differ from batch lde"
+
+
+def test_multiplication_dispatch():
+    field = BaseField.main()
+    xfield = ExtensionField.main()
+    for F, size in [(field, 17), (xfield, 24)]:
+        for n, m in [(3, 5), (20, 40), (40, 33), (17, 150), (70, 100)]:
+            lhs = [F.sample(os.urandom(size)) for i in range(n)]
+            rhs = [F.sample(os.urandom(size)) for i in range(m)]
+            expected = Polynomial(Polynomial.schoolbook(lhs, rhs))
+            assert(Polynomial(lhs) * Polynomial(rhs) ==
+                   expected), f"product of {n} and {m} coefficients fails"
+            assert(Polynomial(Polynomial.karatsuba(lhs, rhs)) ==
+                   expected), f"karatsuba product of {n} and {m} coefficients fails"
+
+
+def test_randomized_interpolant():
+    field = BaseField.main()
+    xfield = ExtensionField.main()
+    height, num_randomizers = 16, 3
+    omicron = field.primitive_nth_root(height)
+    for sample in [lambda: field.sample(os.urandom(17)), lambda: xfield.sample(os.urandom(24))]:
+        column = [sample() for i in range(height)]
+        randomizers = [field.sample(os.urandom(17))
+                       for i in range(num_randomizers)]
+        polynomial = randomized_interpolant(column, randomizers, omicron)
+        assert(polynomial.degree() == height + num_randomizers -
+               1), "randomized interpolant has wrong degree"
+        assert([polynomial.evaluate(omicron ^ i) for i in range(height)]
+               == column), "randomized interpolant does not match trace on omicron subgroup"
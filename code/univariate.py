@@ -1,29 +1,61 @@
 from algebra import *
 
 
+# geometric sequences over evaluation domains, keyed by (generator, offset,
+# length); shared, so callers must copy before modifying
+power_cache = {}
+
+
+def geometric_sequence(generator, length, offset=None):
+    # [offset * generator^i for i < length], one multiplication per element
+    if offset is None:
+        offset = generator.field.one()
+    sequence = [offset] if length > 0 else []
+    for i in range(1, length):
+        sequence += [sequence[-1] * generator]
+    return sequence
+
+
+def power_table(generator, length, offset=None):
+    # geometric_sequence, cached; only for domains that recur, such as the
+    # FRI domains and the omicron subgroups
+    if offset is None:
+        offset = generator.field.one()
+    key = (generator.__class__, generator, offset.__class__, offset, length)
+    table = power_cache.get(key)
+    if table is None:
+        table = geometric_sequence(generator, length, offset)
+        power_cache[key] = table
+    return table
+
+
 class Polynomial:
+    # divide with Newton iteration and NTT multiplication once the quotient
+    # has at least this many coefficients
+    fast_division_threshold = 64
+    # multiply with Karatsuba once the shorter operand has at least this many
+    # coefficients, and with NTTs from at least this many when the field has
+    # the roots of unity for it
+    karatsuba_threshold = 16
+    fast_multiplication_threshold = 64
+
+    # coefficients are trimmed of trailing zeros on construction, so the
+    # degree is one less than their number; do not modify them in place
     def __init__(self, coefficients):
         self.coefficients = [c for c in coefficients]
+        while self.coefficients != [] and self.coefficients[-1].is_zero():
+            self.coefficients.pop()
 
     def degree(self):
-        if self.coefficients == []:
-            return -1
-        zero = self.coefficients[0].field.zero()
-        if self.coefficients == [zero] * len(self.coefficients):
-            return -1
-        maxindex = 0
-        for i in range(len(self.coefficients)):
-            if self.coefficients[i] != zero:
-                maxindex = i
-        return maxindex
+        return len(self.coefficients) - 1
 
     def __neg__(self):
         return Polynomial([-c for c in self.coefficients])
 
     def __add__(self, other):
-        if self.degree() == -1:
+        if self.coefficients == []:
             return other
-        elif other.degree() == -1:
+        elif other.coefficients == []:
             return self
         field = self.coefficients[0].field
         coeffs = [field.zero()] * max(len(self.coefficients),
@@ -40,15 +72,63 @@ class Polynomial:
     def __mul__(self, other):
         if self.coefficients == [] or other.coefficients == []:
             return Polynomial([])
-        zero = self.coefficients[0].field.zero()
-        buf = [zero] * (len(self.coefficients) + len(other.coefficients) - 1)
-        for i in range(len(self.coefficients)):
-            if self.coefficients[i].is_zero():
+        shorter = min(len(self.coefficients), len(other.coefficients))
+        if shorter >= Polynomial.fast_multiplication_threshold:
+            from ntt import fast_multiply, root_of_unity  # ntt imports this module
+            order = 1 << (len(self.coefficients) +
+                          len(other.coefficients) - 2).bit_length()
+            root = root_of_unity(self.coefficients[0].field, order)
+            if root is not None:
+                return fast_multiply(self, other, root, order)
+        if shorter >= Polynomial.karatsuba_threshold:
+            return Polynomial(Polynomial.karatsuba(self.coefficients, other.coefficients))
+        return Polynomial(Polynomial.schoolbook(self.coefficients, other.coefficients))
+
+    def schoolbook(lhs, rhs):
+        zero = lhs[0].field.zero()
+        buf = [zero] * (len(lhs) + len(rhs) - 1)
+        for i in range(len(lhs)):
+            if lhs[i].is_zero():
                 continue  # optimization for sparse polynomials
-            for j in range(len(other.coefficients)):
-                buf[i+j] = buf[i+j] + self.coefficients[i] * \
-                    other.coefficients[j]
-        return Polynomial(buf)
+            for j in range(len(rhs)):
+                buf[i+j] = buf[i+j] + lhs[i] * rhs[j]
+        return buf
+
+    def karatsuba(lhs, rhs):
+        # split both coefficient lists at half and recombine three products:
+        #   (l0 + l1 X^h)(r0 + r1 X^h) = l0 r0 + ((l0 + l1)(r0 + r1) - l0 r0 - l1 r1) X^h + l1 r1 X^2h
+        if min(len(lhs), len(rhs)) < Polynomial.karatsuba_threshold:
+            return Polynomial.schoolbook(lhs, rhs)
+        half = (max(len(lhs), len(rhs)) + 1) // 2
+        if min(len(lhs), len(rhs)) <= half:
+            # unbalanced; split the longer operand only
+            if len(lhs) < len(rhs):
+                lhs, rhs = rhs, lhs
+            low = Polynomial.karatsuba(lhs[:half], rhs)
+            high = Polynomial.karatsuba(lhs[half:], rhs)
+            return Polynomial.combine(low, high, half)
+
+        l0, l1 = lhs[:half], lhs[half:]
+        r0, r1 = rhs[:half], rhs[half:]
+        low = Polynomial.karatsuba(l0, r0)
+        high = Polynomial.karatsuba(l1, r1)
+        lsum = [a + b for a, b in zip(l0, l1)] + l0[len(l1):]
+        rsum = [a + b for a, b in zip(r0, r1)] + r0[len(r1):]
+        middle = Polynomial.karatsuba(lsum, rsum)
+        for i in range(len(low)):
+            middle[i] = middle[i] - low[i]
+        for i in range(len(high)):
+            middle[i] = middle[i] - high[i]
+        buf = Polynomial.combine(low, middle, half)
+        return Polynomial.combine(buf, high, 2 * half)
+
+    def combine(lhs, rhs, shift):
+        # coefficients of lhs + X^shift * rhs
+        buf = lhs + [lhs[0].field.zero()] * \
+            max(0, shift + len(rhs) - len(lhs))
+        for i in range(len(rhs)):
+            buf[shift + i] = buf[shift + i] + rhs[i]
+        return buf
 
     def __truediv__(self, other):
         quo, rem = Polynomial.divide(self, other)
@@ -67,25 +147,18 @@ class Polynomial:
     def __eq__(self, other):
         assert(type(self) == type(
             other)), f"type of self {type(self)} must be equal to type of other which is {type(other)}"
-        if self.degree() != other.degree():
+        if len(self.coefficients) != len(other.coefficients):
             return False
-        if self.degree() == -1:
-            return True
-        return all(self.coefficients[i] == other.coefficients[i] for i in range(min(len(self.coefficients), len(other.coefficients))))
+        return all(l == r for l, r in zip(self.coefficients, other.coefficients))
 
     def __neq__(self, other):
         return not self.__eq__(other)
 
-    def is_zero(self):
-        if self.degree() == -1:
-            return True
-        return False
-
     def __str__(self):
         return "[" + ",".join(s.__str__() for s in self.coefficients) + "]"
 
     def leading_coefficient(self):
-        return self.coefficients[self.degree()]
+        return self.coefficients[-1]
 
     def divide(numerator, denominator):
         if denominator.degree() == -1:
@@ -93,6 +166,10 @@ class Polynomial:
         if numerator.degree() < denominator.degree():
             return (Polynomial([]), numerator)
         field = denominator.coefficients[0].field
+        if numerator.degree() - denominator.degree() + 1 >= Polynomial.fast_division_threshold:
+            from ntt import fast_divide, root_of_unity  # ntt imports this module
+            if root_of_unity(field, 2) is not None:
+                return fast_divide(numerator, denominator)
         remainder = Polynomial([n for n in numerator.coefficients])
         quotient_coefficients = [field.zero() for i in range(
             numerator.degree()-denominator.degree()+1)]
@@ -109,12 +186,7 @@ class Polynomial:
         return quotient, remainder
 
     def is_zero(self):
-        if self.coefficients == []:
-            return True
-        for c in self.coefficients:
-            if not c.is_zero():
-                return False
-        return True
+        return self.coefficients == []
 
     def interpolate_domain(domain, values):
         assert(len(domain) == len(
@@ -166,7 +238,7 @@ class Polynomial:
         return acc
 
     def scale(self, factor):
-        return Polynomial([(factor ^ i) * self.coefficients[i] for i in range(len(self.coefficients))])
+        return Polynomial([c * f for c, f in zip(self.coefficients, geometric_sequence(factor, len(self.coefficients)))])
 
     def xgcd(x, y):
         one = Polynomial([x.coefficients[0].field.one()])
@@ -181,7 +253,7 @@ class Polynomial:
             old_s, s = (s, old_s - quotient * s)
             old_t, t = (t, old_t - quotient * t)
 
-        lcinv = old_r.coefficients[old_r.degree()].inverse()
+        lcinv = old_r.leading_coefficient().inverse()
 
         # a, b, g
         return Polynomial([c*lcinv for c in old_s.coefficients]), Polynomial([c*lcinv for c in old_t.coefficients]), Polynomial([c*lcinv for c in old_r.coefficients])